@@ -12,9 +12,16 @@ This app uses Groq's function calling to autonomously analyze forex markets
 using Smart Money Concepts (SMC) methodology.
 """
 
+import asyncio
+import hashlib
+import importlib
+import os
+import re
+import shelve
 import streamlit as st
-import json
-from groq import Groq
+import orjson
+import httpx
+from groq import AsyncGroq
 
 # Page configuration
 st.set_page_config(
@@ -23,169 +30,220 @@ st.set_page_config(
     layout="wide"
 )
 
-# Import real Polygon API (with fallback to mock)
+# Resolve the real Polygon API (with fallback to mock) once per process,
+# deferred to the first fetch - importing the polygon client stack at module
+# scope would tax every widget-only rerun
+@st.cache_resource
+def _forex_backend():
+    """Return (fetch_function, is_real_data) for the market-data source"""
+    try:
+        from utils.polygon_api import get_forex_data
+        return get_forex_data, True
+    except ImportError:
+        from utils.polygon_mock import get_forex_data
+        return get_forex_data, False
+
+# TTL-tiered memoization of the data fetch: intrabar timeframes go stale
+# within about a minute, while 15m+ candles are safe to reuse far longer.
+# st.cache_data fixes ttl per decorated function, hence the two-tier split.
+_FAST_TIMEFRAMES = {"1m", "5m"}
+
+
+# xxh3 hashes multi-KB candle payloads roughly an order of magnitude
+# faster than blake2b; fall back to hashlib when xxhash isn't installed
 try:
-    from utils.polygon_api import get_forex_data
-    st.sidebar.success("✅ Using Real Polygon.io Data")
+    import xxhash
+
+    def _fast_digest(payload):
+        return xxhash.xxh3_64_hexdigest(payload)
 except ImportError:
-    from utils.polygon_mock import get_forex_data
-    st.sidebar.warning("⚠️ Using Mock Data (Install polygon-api-client)")
+    def _fast_digest(payload):
+        return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def _attach_bar_hash(data):
+    """Stamp the data dict with a content hash of its candles
+
+    Downstream SMC caches key on this 16-char digest instead of
+    pickle-hashing the full candle payload on every lookup.
+    """
+    candles = data.get('candles')
+    if candles:
+        data['bar_hash'] = _fast_digest(orjson.dumps(candles))
+    return data
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _get_forex_data_fast(pair, timeframe):
+    fetch, _ = _forex_backend()
+    return _attach_bar_hash(fetch(pair, timeframe))
 
-# Import all SMC functions
-from utils.smc_functions import (
+
+@st.cache_data(ttl=900, show_spinner=False)
+def _get_forex_data_slow(pair, timeframe):
+    fetch, _ = _forex_backend()
+    return _attach_bar_hash(fetch(pair, timeframe))
+
+
+def cached_get_forex_data(pair, timeframe):
+    """Fetch market data through a TTL cache tiered on bar duration
+
+    The data layer logs its problems and reports them under 'warnings'
+    instead of calling st.* itself; surface them here, in UI territory.
+    """
+    if timeframe in _FAST_TIMEFRAMES:
+        data = _get_forex_data_fast(pair, timeframe)
+    else:
+        data = _get_forex_data_slow(pair, timeframe)
+    for message in data.get('warnings', []):
+        st.warning(f"⚠️ {message}")
+    return data
+
+# SMC function names, grouped as in utils/smc_functions.py - imported
+# lazily on first dispatch so app boot doesn't pay for all 24 functions
+SMC_FUNCTION_NAMES = (
     # Market Structure
-    detect_bos, detect_choch, detect_market_structure_break,
+    "detect_bos", "detect_choch", "detect_market_structure_break",
     # Liquidity
-    detect_liquidity_sweep, identify_liquidity_pools, detect_liquidity_void,
+    "detect_liquidity_sweep", "identify_liquidity_pools", "detect_liquidity_void",
     # Order Blocks & FVG
-    identify_order_blocks, identify_fair_value_gaps, identify_breaker_blocks,
+    "identify_order_blocks", "identify_fair_value_gaps", "identify_breaker_blocks",
     # Premium/Discount
-    calculate_premium_discount_zones,
+    "calculate_premium_discount_zones",
     # Imbalances
-    detect_imbalances, detect_inefficiencies,
+    "detect_imbalances", "detect_inefficiencies",
     # Volume & Flow
-    analyze_volume_profile, detect_smart_money_divergence, analyze_order_flow,
+    "analyze_volume_profile", "detect_smart_money_divergence", "analyze_order_flow",
     # Multi-Timeframe
-    analyze_higher_timeframe_structure, identify_confluences,
+    "analyze_higher_timeframe_structure", "identify_confluences",
     # Session & Time
-    analyze_session_characteristics, detect_news_impact_zones,
+    "analyze_session_characteristics", "detect_news_impact_zones",
     # Advanced
-    identify_manipulation_patterns, calculate_institutional_levels,
-    detect_wyckoff_phases, identify_turtle_soup_setups
+    "identify_manipulation_patterns", "calculate_institutional_levels",
+    "detect_wyckoff_phases", "identify_turtle_soup_setups"
 )
 
 
-# Initialize Groq client
-@st.cache_resource
-def get_groq_client():
-    """Initialize Groq client with API key from secrets"""
+def get_groq_api_key():
+    """Read the Groq API key from secrets, surfacing setup help if absent"""
     try:
-        api_key = st.secrets["GROQ_API_KEY"]
-        return Groq(api_key=api_key)
+        return st.secrets["GROQ_API_KEY"]
     except Exception as e:
         st.error(f"Error loading Groq API key: {e}")
         st.info("Please add GROQ_API_KEY to .streamlit/secrets.toml")
         return None
 
-# System prompt for Groq LLM - COMPLETE SMC ANALYST
-SYSTEM_PROMPT = """You are an elite forex analyst and expert in Smart Money Concepts (SMC) with access to a comprehensive suite of analysis tools. 
-Your role is to analyze forex markets using institutional trading concepts and provide actionable trading recommendations.
-
-ANALYSIS WORKFLOW:
-1. ALWAYS call get_forex_data() FIRST to retrieve market data for the requested pair and timeframe
-2. Based on the user's query and market conditions, intelligently select from these analysis functions:
-
-MARKET STRUCTURE ANALYSIS:
-- detect_bos(): Break of Structure (trend continuation)
-- detect_choch(): Change of Character (trend reversal)
-- detect_market_structure_break(): Aggressive structure breaks (strong momentum)
-
-LIQUIDITY ANALYSIS:
-- detect_liquidity_sweep(): Stop hunts above/below key levels
-- identify_liquidity_pools(): Areas with concentrated stop losses
-- detect_liquidity_void(): Price gaps that often get filled
-
-ORDER BLOCKS & ZONES:
-- identify_order_blocks(): Institutional demand/supply zones
-- identify_fair_value_gaps(): 3-candle imbalances (FVG)
-- identify_breaker_blocks(): Failed order blocks that flip polarity
-
-PREMIUM/DISCOUNT:
-- calculate_premium_discount_zones(): Determine if price is overvalued/undervalued
 
-IMBALANCES:
-- detect_imbalances(): Rapid price moves leaving gaps
-- detect_inefficiencies(): Poorly traded zones
+def _make_groq_client(api_key):
+    """Build an async Groq client for one analysis run
 
-VOLUME & FLOW:
-- analyze_volume_profile(): POC and value area
-- detect_smart_money_divergence(): Price vs institution participation
-- analyze_order_flow(): Buying vs selling pressure
-
-MULTI-TIMEFRAME:
-- analyze_higher_timeframe_structure(): HTF context and bias
-- identify_confluences(): Multiple SMC factors aligned
+    Keep-alive + HTTP/2 so the repeated POSTs of the iteration loop reuse
+    one connection instead of re-paying TCP/TLS setup. Built fresh per
+    asyncio.run: each run gets its own event loop, and pooled connections
+    from a previous run's (now closed) loop would raise 'Event loop is
+    closed' on reuse - so the client must not outlive its loop.
+    """
+    return AsyncGroq(
+        api_key=api_key,
+        http_client=httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=30)
+        )
+    )
 
-SESSION & TIME:
-- analyze_session_characteristics(): Asian/London/NY behaviors
-- detect_news_impact_zones(): Fundamental event reactions
+# System prompt for Groq LLM - kept compact since the tool schemas already
+# carry per-function descriptions; prompt tokens directly add latency
+SYSTEM_PROMPT = """You are an elite forex analyst and expert in Smart Money Concepts (SMC).
+Analyze forex markets using institutional trading concepts and provide actionable recommendations.
 
-ADVANCED CONCEPTS:
-- identify_manipulation_patterns(): Stop hunts, traps, false breakouts
-- calculate_institutional_levels(): Round numbers and psychological levels
-- detect_wyckoff_phases(): Accumulation/distribution patterns
-- identify_turtle_soup_setups(): False breakout reversals
+WORKFLOW:
+1. ALWAYS call get_forex_data() FIRST for the requested pair and timeframe
+2. Then request ALL analysis tools relevant to the query in ONE response (4-6 for comprehensive requests) - batched tool calls run in parallel, so never request them one at a time
 
-SMART MONEY CONCEPTS PRINCIPLES:
+SMC PRINCIPLES:
 - BOS confirms trend, CHoCH signals reversal
-- Trade from order blocks (demand = buy, supply = sell)
-- Buy in discount zones, sell in premium zones
-- Liquidity sweeps often precede reversals
-- FVGs and imbalances act as magnets
-- Higher timeframe bias increases probability
-- Confluences create high-probability setups
-- Smart money manipulates retail before true moves
-
-ANALYSIS APPROACH:
-- Don't call every function - be selective based on the query
-- If user asks for specific analysis (e.g., "find order blocks"), focus on that
-- For comprehensive analysis, use 4-6 relevant functions
-- Always prioritize higher timeframe context when available
-- Look for confluences (multiple factors aligning)
+- Trade from order blocks (demand = buy, supply = sell); buy discount, sell premium
+- Liquidity sweeps often precede reversals; FVGs and imbalances act as magnets
+- Higher timeframe bias and confluences increase probability
 
 OUTPUT FORMAT:
-Provide your analysis in this structure:
 1. **Market Context**: Trend, session, volatility, HTF bias
 2. **Key SMC Findings**: Most important signals from your analysis
-3. **Trade Setup**:
-   - Direction: BUY/SELL or NO TRADE
-   - Entry: Specific price level with reasoning
-   - Stop Loss: Price level with reasoning
-   - Take Profit: Price level(s) with reasoning
-   - Risk/Reward Ratio
+3. **Trade Setup**: Direction (BUY/SELL or NO TRADE), Entry, Stop Loss, Take Profit, Risk/Reward
 4. **Reasoning**: Explain using SMC principles, mention confluences
 5. **Risk Factors**: What could invalidate the setup
 
-Be precise with price levels, always prioritize risk management, and explain your reasoning clearly using SMC terminology."""
+Be precise with price levels and always prioritize risk management."""
+
+# Reused verbatim as message[0] on every request. Groq's automatic prefix
+# caching only matches up to the first differing byte, so the system prompt
+# (and the frozen tool schemas) must stay byte-identical across calls, with
+# all per-query content ordered after them.
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+# Model tiers - a fast model for simple queries, the large model only when
+# the query needs deep multi-tool analysis (model choice dominates TTFT)
+SPEED_MAP = {
+    "instant": "llama-3.1-8b-instant",
+    "balanced": "llama-3.3-70b-versatile",
+}
+
+# Compiled once at import - a single C-level scan instead of a Python
+# keyword loop per request
+_ADVANCED_RE = re.compile(r"\b(comprehensive|wyckoff|multi-timeframe|manipulation|confluences?)\b", re.IGNORECASE)
+
+
+def select_model(query):
+    """Pick a model tier based on query complexity"""
+    if _ADVANCED_RE.search(query):
+        return SPEED_MAP["balanced"]
+    return SPEED_MAP["instant"]
 
 # Define available functions for Groq - ALL SMC FUNCTIONS
+# Values are either a callable or a (module, attribute) tuple resolved lazily
 AVAILABLE_FUNCTIONS = {
-    # Data
-    "get_forex_data": get_forex_data,
-    # Market Structure
-    "detect_bos": detect_bos,
-    "detect_choch": detect_choch,
-    "detect_market_structure_break": detect_market_structure_break,
-    # Liquidity
-    "detect_liquidity_sweep": detect_liquidity_sweep,
-    "identify_liquidity_pools": identify_liquidity_pools,
-    "detect_liquidity_void": detect_liquidity_void,
-    # Order Blocks & FVG
-    "identify_order_blocks": identify_order_blocks,
-    "identify_fair_value_gaps": identify_fair_value_gaps,
-    "identify_breaker_blocks": identify_breaker_blocks,
-    # Premium/Discount
-    "calculate_premium_discount_zones": calculate_premium_discount_zones,
-    # Imbalances
-    "detect_imbalances": detect_imbalances,
-    "detect_inefficiencies": detect_inefficiencies,
-    # Volume & Flow
-    "analyze_volume_profile": analyze_volume_profile,
-    "detect_smart_money_divergence": detect_smart_money_divergence,
-    "analyze_order_flow": analyze_order_flow,
-    # Multi-Timeframe
-    "analyze_higher_timeframe_structure": analyze_higher_timeframe_structure,
-    "identify_confluences": identify_confluences,
-    # Session & Time
-    "analyze_session_characteristics": analyze_session_characteristics,
-    "detect_news_impact_zones": detect_news_impact_zones,
-    # Advanced
-    "identify_manipulation_patterns": identify_manipulation_patterns,
-    "calculate_institutional_levels": calculate_institutional_levels,
-    "detect_wyckoff_phases": detect_wyckoff_phases,
-    "identify_turtle_soup_setups": identify_turtle_soup_setups
+    # Data - routed through the TTL cache so LLM-issued calls, the preseed,
+    # and repeat runs on the same bars all share one fetch
+    "get_forex_data": cached_get_forex_data,
+    # SMC analysis suite
+    **{name: ("utils.smc_functions", name) for name in SMC_FUNCTION_NAMES}
 }
 
+# Resolved callables, populated on first dispatch of each function
+_FUNCTION_CACHE = {}
+
+# Market-data dicts are hashed by the bar_hash stamped at fetch time (O(1))
+# rather than pickled wholesale; dicts without one fall back to a canonical
+# JSON dump so ad-hoc arguments still cache correctly
+_DATA_HASH_FUNCS = {
+    dict: lambda d: d.get('bar_hash') or orjson.dumps(d, option=orjson.OPT_SORT_KEYS)
+}
+
+
+def _resolve_function(function_name):
+    """Resolve a tool name to a callable, importing its module on first use"""
+    function = _FUNCTION_CACHE.get(function_name)
+    if function is not None:
+        return function
+
+    target = AVAILABLE_FUNCTIONS.get(function_name)
+    if target is None:
+        return None
+
+    if callable(target):
+        function = target
+    else:
+        module_name, attribute = target
+        function = getattr(importlib.import_module(module_name), attribute)
+        # SMC functions are pure over the market data, so memoize each one
+        # on (function, bar_hash) - repeat invocations within the data TTL
+        # become dict lookups instead of full recomputations
+        function = st.cache_data(show_spinner=False, hash_funcs=_DATA_HASH_FUNCS)(function)
+
+    _FUNCTION_CACHE[function_name] = function
+    return function
+
 # Function schemas for Groq - COMPLETE SMC TOOLKIT
 FUNCTION_SCHEMAS = [
     # ========== DATA RETRIEVAL ==========
@@ -549,53 +607,602 @@ FUNCTION_SCHEMAS = [
     }
 ]
 
+# Freeze the schema list once at import: the SDK serializes tools= on every
+# create() call, and an immutable tuple keeps the payload byte-stable across
+# iterations (also a prerequisite for provider-side prefix caching)
+FUNCTION_SCHEMAS = tuple(FUNCTION_SCHEMAS)
 
-# ------------------------- STREAMLIT UI ----------------------------
+# Keyword routing for dynamic tool selection - the full 24 schemas cost
+# a few thousand prompt tokens on every call, but a query like "find order
+# blocks" only needs a handful of them
+KEYWORD_TO_TOOLS = {
+    "structure": {"detect_bos", "detect_choch", "detect_market_structure_break"},
+    "bos": {"detect_bos"},
+    "choch": {"detect_choch"},
+    "reversal": {"detect_choch", "detect_liquidity_sweep", "identify_turtle_soup_setups"},
+    "liquidity": {"detect_liquidity_sweep", "identify_liquidity_pools", "detect_liquidity_void"},
+    "sweep": {"detect_liquidity_sweep"},
+    "stop hunt": {"detect_liquidity_sweep", "identify_manipulation_patterns"},
+    "order block": {"identify_order_blocks", "identify_breaker_blocks"},
+    "breaker": {"identify_breaker_blocks"},
+    "fair value": {"identify_fair_value_gaps"},
+    "fvg": {"identify_fair_value_gaps"},
+    "gap": {"identify_fair_value_gaps", "detect_liquidity_void"},
+    "premium": {"calculate_premium_discount_zones"},
+    "discount": {"calculate_premium_discount_zones"},
+    "imbalance": {"detect_imbalances", "detect_inefficiencies"},
+    "inefficien": {"detect_inefficiencies"},
+    "volume": {"analyze_volume_profile", "analyze_order_flow"},
+    "divergence": {"detect_smart_money_divergence"},
+    "order flow": {"analyze_order_flow"},
+    # Note: bare "timeframe" is not a keyword - nearly every query names
+    # its chart timeframe, which says nothing about analysis intent
+    "htf": {"analyze_higher_timeframe_structure"},
+    "higher timeframe": {"analyze_higher_timeframe_structure"},
+    "multi-timeframe": {"analyze_higher_timeframe_structure"},
+    "multi timeframe": {"analyze_higher_timeframe_structure"},
+    "confluence": {"identify_confluences"},
+    "session": {"analyze_session_characteristics"},
+    "news": {"detect_news_impact_zones"},
+    "manipulation": {"identify_manipulation_patterns", "identify_turtle_soup_setups"},
+    "trap": {"identify_manipulation_patterns"},
+    "institutional": {"calculate_institutional_levels"},
+    "round number": {"calculate_institutional_levels"},
+    "psychological": {"calculate_institutional_levels"},
+    "wyckoff": {"detect_wyckoff_phases"},
+    "turtle": {"identify_turtle_soup_setups"},
+}
+
+
+def select_tools(query):
+    """Filter the tool schemas to the subset the query actually mentions
+
+    get_forex_data is always included, and the filtered tuple preserves
+    FUNCTION_SCHEMAS order so the serialized payload stays stable across
+    iterations of one analysis. Open-ended queries with no keyword match
+    ("analyze EURUSD") get the full toolkit.
+    """
+    lowered = query.lower()
+    selected = set()
+    for keyword, names in KEYWORD_TO_TOOLS.items():
+        if keyword in lowered:
+            selected.update(names)
+    if not selected:
+        return FUNCTION_SCHEMAS
+    selected.add("get_forex_data")
+    return tuple(
+        schema for schema in FUNCTION_SCHEMAS
+        if schema["function"]["name"] in selected
+    )
 
-st.title("📈 Forex Market Analyzer (Groq + Smart Money Concepts)")
-st.write("Analyze forex pairs using institutional logic (SMC) powered by Groq LLM.")
 
-pair = st.selectbox("Select Forex Pair", ["EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "USDCAD"])
-timeframe = st.selectbox("Select Timeframe", ["1m", "5m", "15m", "1h", "4h", "1d"])
-query = st.text_area("Enter your analysis request", 
-                     "Analyze today's EURUSD market structure, liquidity, and possible smart money setup.")
+# ------------------------- ANALYSIS ENGINE ----------------------------
 
-if st.button("🔍 Run Analysis"):
-    client = get_groq_client()
-    if not client:
-        st.stop()
+# No dependency DAG is needed for tool dispatch: by the time the model
+# emits a tool_call its arguments are fully materialized, so every call in
+# a turn is a leaf and can run concurrently.
+
+def execute_function_call(tool_call):
+    """Execute a single tool call requested by the LLM and return its result"""
+    function_name = tool_call['function']['name']
+    function = _resolve_function(function_name)
+
+    if function is None:
+        return {'error': f"Unknown function: {function_name}"}
 
-    st.info("Fetching market data...")
     try:
-        data = get_forex_data(pair=pair, timeframe=timeframe)
-        st.success(f"Market data retrieved for {pair} ({timeframe})")
+        function_args = orjson.loads(tool_call['function']['arguments'])
+        return function(**function_args)
     except Exception as e:
-        st.error(f"Data retrieval failed: {e}")
-        st.stop()
+        return {'error': str(e)}
+
+
+# Keep the growing conversation bounded - prompt tokens (and Groq latency)
+# otherwise scale linearly with iteration count
+_HISTORY_TOKEN_BUDGET = 6000
+
+
+def _approx_tokens(messages):
+    """Rough token estimate (~4 chars per token) for the message history"""
+    return sum(len(str(m.get('content') or '')) for m in messages) // 4
+
+
+async def _compress_history(client, messages):
+    """
+    Collapse older tool results into a single summarized message
+
+    Keeps the system prompt, the user query, and the most recent
+    assistant/tool exchange verbatim; everything in between is replaced
+    by a compact 'prior findings' summary produced by the fast model.
+    """
+
+    # Most recent assistant turn (and the tool results after it) stay verbatim
+    idx = len(messages) - 1
+    while idx > 1 and messages[idx].get('role') != 'assistant':
+        idx -= 1
+    if idx <= 2:
+        return messages
+
+    findings = "\n".join(
+        f"{m.get('name')}: {m.get('content')}"
+        for m in messages[2:idx] if m.get('role') == 'tool'
+    )
+    if not findings:
+        return messages
+
+    summary_response = await client.chat.completions.create(
+        model=SPEED_MAP["instant"],
+        messages=[
+            {"role": "system", "content": "Summarize these SMC tool results into concise prior findings. Preserve all price levels and signal directions."},
+            {"role": "user", "content": findings}
+        ],
+        temperature=0,
+        max_tokens=512
+    )
+    summary = summary_response.choices[0].message.content
+
+    return messages[:2] + [
+        {"role": "assistant", "content": f"Prior findings (summarized):\n{summary}"}
+    ] + messages[idx:]
+
+
+# Full tool results stay out of the execution log (and out of session/disk
+# caches of it) - log entries carry a small preview plus a handle into this
+# in-process store, so a multi-megabyte OHLCV payload is held once
+_RESULT_STORE = {}
+_PREVIEW_CHARS = 2000
+
+
+# Pretty-printed JSON per result handle, serialized once instead of on
+# every script rerun of the trace expander
+_TRACE_RENDER_CACHE = {}
+
+
+def _pretty_result(handle, preview):
+    """Indented JSON for a trace entry, cached per result handle"""
+    rendered = _TRACE_RENDER_CACHE.get(handle)
+    if rendered is None:
+        full_result = _RESULT_STORE.get(handle)
+        if full_result is None:
+            return preview
+        rendered = orjson.dumps(
+            full_result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+        ).decode()
+        _TRACE_RENDER_CACHE[handle] = rendered
+    return rendered
+
+
+def _store_result(function_result):
+    """Stash a full tool result, returning a content handle and a preview"""
+    serialized = orjson.dumps(function_result, option=orjson.OPT_SERIALIZE_NUMPY)
+    handle = hashlib.blake2b(serialized, digest_size=8).hexdigest()
+    _RESULT_STORE[handle] = function_result
+    preview = serialized[:_PREVIEW_CHARS].decode(errors="ignore")
+    if len(serialized) > _PREVIEW_CHARS:
+        preview += " ..."
+    return handle, preview
+
+
+# Tool results fed back to Groq become prompt tokens on every later turn.
+# The market-data payload dominates, so the copy sent to the model keeps
+# only the recent candle history and drops internal bookkeeping fields;
+# the full result stays in _RESULT_STORE for the trace.
+_LLM_CANDLE_LIMIT = 60
+_INTERNAL_FIELDS = ('bar_hash', '_arrays', '_cache')
+
+
+def _compact_for_llm(result):
+    """Compact view of a tool result for its role=tool message"""
+    if not isinstance(result, dict):
+        return result
+    candles = result.get('candles')
+    needs_trim = isinstance(candles, list) and len(candles) > _LLM_CANDLE_LIMIT
+    if not needs_trim and not any(k in result for k in _INTERNAL_FIELDS):
+        return result
+    compact = {k: v for k, v in result.items() if k not in _INTERNAL_FIELDS}
+    if needs_trim:
+        compact['candles'] = candles[-_LLM_CANDLE_LIMIT:]
+        compact['candles_note'] = f"most recent {_LLM_CANDLE_LIMIT} of {len(candles)} bars"
+    return compact
+
+
+# Uppercase 6-letter pair followed by a timeframe somewhere in the query
+_PAIR_TF_RE = re.compile(r'\b([A-Z]{6})\b.*?\b((?i:1m|5m|15m|30m|1h|4h|1d))\b')
+
+
+def _preseed_market_data(query):
+    """
+    Pre-fetch market data when the query explicitly names pair and timeframe
+
+    The system prompt makes the model call get_forex_data() first on nearly
+    every run; seeding that exchange before the first Groq call saves a full
+    iteration (TTFT plus completion tokens).
+    """
+
+    match = _PAIR_TF_RE.search(query)
+    if not match:
+        return None
+
+    pair, timeframe = match.group(1), match.group(2).lower()
+    tool_call = {
+        "id": "preseed_0",
+        "type": "function",
+        "function": {
+            "name": "get_forex_data",
+            "arguments": orjson.dumps({"pair": pair, "timeframe": timeframe}).decode()
+        }
+    }
+    result = execute_function_call(tool_call)
+    seed_messages = [
+        {"role": "assistant", "content": None, "tool_calls": [tool_call]},
+        {
+            "role": "tool",
+            "tool_call_id": tool_call["id"],
+            "name": "get_forex_data",
+            "content": orjson.dumps(_compact_for_llm(result), option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        }
+    ]
+    return seed_messages, _tool_cache_key(tool_call), result
 
-    st.info("Analyzing with Groq LLM...")
 
+def _tool_cache_key(tool_call):
+    """Canonical cache key for a tool call: function name + sorted-args JSON"""
+    arguments = tool_call['function']['arguments']
     try:
-        # Groq LLM call
-        response = client.chat.completions.create(
-            model="mixtral-8x7b-32768",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": query}
-            ],
-            tools=FUNCTION_SCHEMAS,
-            tool_choice="auto"
+        canonical_args = orjson.dumps(orjson.loads(arguments), option=orjson.OPT_SORT_KEYS).decode()
+    except ValueError:
+        canonical_args = arguments
+    return (tool_call['function']['name'], canonical_args)
+
+
+# Token caps per turn type - tool-call turns emit only compact JSON, so
+# they never need the budget reserved for the final written analysis
+_TOOL_TURN_MAX_TOKENS = 512
+_FINAL_TURN_MAX_TOKENS = 2048
+
+
+async def stream_completion(client, model, messages, placeholder=None, max_tokens=_FINAL_TURN_MAX_TOKENS, tools=FUNCTION_SCHEMAS):
+    """
+    Stream one chat completion, rendering tokens as they arrive
+
+    Content deltas are written incrementally into the given Streamlit
+    placeholder so the user sees output at time-to-first-token instead of
+    waiting for the full generation. Tool-call deltas are reassembled by
+    index into complete tool_call dicts.
+    """
+
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        tools=tools,
+        tool_choice="auto",
+        temperature=0,
+        max_tokens=max_tokens,
+        stream=True
+    )
+
+    content = ""
+    tool_calls = {}
+    finish_reason = None
+
+    async for chunk in stream:
+        if chunk.choices[0].finish_reason:
+            finish_reason = chunk.choices[0].finish_reason
+        delta = chunk.choices[0].delta
+
+        if delta.content:
+            content += delta.content
+            if placeholder is not None:
+                placeholder.markdown(content + "▌")
+
+        for tc_delta in delta.tool_calls or []:
+            entry = tool_calls.setdefault(tc_delta.index, {
+                "id": "",
+                "type": "function",
+                "function": {"name": "", "arguments": ""}
+            })
+            if tc_delta.id:
+                entry["id"] = tc_delta.id
+            if tc_delta.function.name:
+                entry["function"]["name"] += tc_delta.function.name
+            if tc_delta.function.arguments:
+                entry["function"]["arguments"] += tc_delta.function.arguments
+
+    if placeholder is not None and content:
+        placeholder.markdown(content)
+
+    return content, [tool_calls[i] for i in sorted(tool_calls)], finish_reason
+
+
+async def run_analysis(client, query, model=None, max_iterations=10, placeholder=None, on_progress=None):
+    """
+    Run the LLM analysis loop until a final answer is produced
+
+    Each iteration sends the conversation to Groq; if the model requests
+    tool calls, they are executed and their results appended before the
+    next iteration. Independent tool calls within one response are
+    executed concurrently (the SMC functions are pure and independent),
+    with results appended in the original tool_call order so the
+    conversation stays valid.
+
+    Async so that Groq round-trips don't block the Streamlit script
+    thread and can overlap with tool execution.
+    """
+
+    if model is None:
+        model = select_model(query)
+
+    # Planner/writer split: tool-selection turns only emit compact call
+    # JSON, which the fast tier handles as well as the large model - the
+    # query-tier model is reserved for writing the final analysis
+    planner_model = SPEED_MAP["instant"]
+    writer_model = model
+
+    # One tool subset per analysis - stable across iterations so the
+    # serialized tools= payload doesn't shift under the provider's cache
+    tools = select_tools(query)
+
+    messages = [
+        _SYSTEM_MESSAGE,
+        {"role": "user", "content": query}
+    ]
+    execution_log = []
+
+    # Memo of tool results for this analysis - the SMC functions are pure
+    # over the market data, so identical calls across iterations (the model
+    # often re-requests get_forex_data) are served without re-executing
+    tool_cache = {}
+
+    # Loop detection - a confused model can re-request the same call every
+    # iteration until max_iterations; flag duplicates and bail out early
+    seen_calls = set()
+    duplicate_calls = 0
+
+    def cached_execute(tool_call):
+        key = _tool_cache_key(tool_call)
+        if key not in tool_cache:
+            tool_cache[key] = execute_function_call(tool_call)
+        return tool_cache[key]
+
+    preseed = _preseed_market_data(query)
+    if preseed is not None:
+        seed_messages, seed_key, seed_result = preseed
+        messages.extend(seed_messages)
+        tool_cache[seed_key] = seed_result
+        seen_calls.add(seed_key)
+        seed_handle, seed_preview = _store_result(seed_result)
+        execution_log.append({
+            'iteration': 0,
+            'function': 'get_forex_data',
+            'arguments': seed_messages[0]['tool_calls'][0]['function']['arguments'],
+            'handle': seed_handle,
+            'preview': seed_preview
+        })
+
+    for iteration in range(max_iterations):
+        if _approx_tokens(messages) > _HISTORY_TOKEN_BUDGET:
+            messages = await _compress_history(client, messages)
+
+        content, tool_calls, finish_reason = await stream_completion(
+            client, planner_model, messages, placeholder, max_tokens=_TOOL_TURN_MAX_TOKENS, tools=tools
         )
 
-        # Show raw model output
-        st.subheader("🧠 LLM Response")
-        st.write(response.choices[0].message.content)
+        if not tool_calls:
+            # No more tools requested - hand off to the writer model for
+            # the final analysis (or retry with the full budget when the
+            # tight tool-turn cap truncated the planner's own answer)
+            if writer_model != planner_model or finish_reason == "length":
+                content, _, _ = await stream_completion(
+                    client, writer_model, messages, placeholder, max_tokens=_FINAL_TURN_MAX_TOKENS, tools=tools
+                )
+            return content, execution_log
 
-        # Parse and pretty display
-        st.json(response.model_dump(), expanded=False)
+        messages.append({
+            "role": "assistant",
+            "content": content or None,
+            "tool_calls": tool_calls
+        })
 
-    except Exception as e:
-        st.error(f"Error during Groq LLM call: {e}")
+        if on_progress is not None:
+            called_names = ", ".join(tc['function']['name'] for tc in tool_calls)
+            on_progress(f"Running {called_names}...")
+
+        # Execute this turn's tool calls concurrently, short-circuiting
+        # any call already issued in a previous iteration
+        call_keys = [_tool_cache_key(tool_call) for tool_call in tool_calls]
+        fresh_calls = [
+            tool_call for tool_call, key in zip(tool_calls, call_keys)
+            if key not in seen_calls
+        ]
+
+        await asyncio.gather(
+            *(asyncio.to_thread(cached_execute, tool_call) for tool_call in fresh_calls)
+        )
+
+        results = []
+        for key in call_keys:
+            if key in seen_calls:
+                duplicate_calls += 1
+                results.append({'warning': 'Duplicate tool call - use the result already provided.'})
+            else:
+                seen_calls.add(key)
+                results.append(tool_cache[key])
+
+        for tool_call, function_result in zip(tool_calls, results):
+            handle, preview = _store_result(function_result)
+            execution_log.append({
+                'iteration': iteration + 1,
+                'function': tool_call['function']['name'],
+                'arguments': tool_call['function']['arguments'],
+                'handle': handle,
+                'preview': preview
+            })
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tool_call['id'],
+                "name": tool_call['function']['name'],
+                "content": orjson.dumps(_compact_for_llm(function_result), option=orjson.OPT_SERIALIZE_NUMPY).decode()
+            })
+
+        if duplicate_calls > 2:
+            return (content or "Analysis stopped - the model kept repeating identical tool calls."), execution_log
+
+    return "Analysis incomplete - maximum iterations reached.", execution_log
+
+
+ANALYSIS_CACHE_PATH = os.path.join(".cache", "groq_analysis")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _normalize_query(query):
+    """Canonical form of a query for cache lookups
+
+    Case and whitespace differences ("Analyze  EURUSD 1h" vs "analyze
+    EURUSD 1h") shouldn't miss the cache. Embedding-based semantic matching
+    would widen hits further but isn't worth the model dependency here.
+    """
+    return _WHITESPACE_RE.sub(" ", query).strip().lower()
+
+
+def _schema_digest(tools):
+    """Digest of a serialized tool subset
+
+    The schema dicts aren't hashable, so no memo here - one orjson dump
+    plus a blake2b over a few KB is microseconds per cache lookup.
+    """
+    return hashlib.blake2b(orjson.dumps(tools), digest_size=8).hexdigest()
+
+
+def _analysis_cache_key(query, model):
+    """Stable key for a deterministic (temperature=0) analysis request
+
+    The digest of the selected tool schemas is folded in so cached entries
+    invalidate when schema descriptions or the keyword routing change.
+    """
+    schemas = _schema_digest(select_tools(query))
+    payload = f"{SYSTEM_PROMPT}|{model}|{schemas}|{_normalize_query(query)}".encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+async def _run_with_client(api_key, query, model, placeholder, on_progress):
+    """Run one analysis with a client scoped to the current event loop"""
+    client = _make_groq_client(api_key)
+    try:
+        return await run_analysis(
+            client, query, model=model, placeholder=placeholder, on_progress=on_progress
+        )
+    finally:
+        await client.close()
+
+
+def cached_run_analysis(api_key, query, model=None, placeholder=None, on_progress=None):
+    """
+    Disk-cached wrapper around run_analysis
+
+    With temperature=0 the analysis is deterministic for a given
+    (prompt, query, model), so repeat queries are served from an on-disk
+    shelve cache in milliseconds instead of re-paying Groq round-trips.
+    """
+
+    if model is None:
+        model = select_model(query)
+
+    key = _analysis_cache_key(query, model)
+    os.makedirs(os.path.dirname(ANALYSIS_CACHE_PATH), exist_ok=True)
+
+    with shelve.open(ANALYSIS_CACHE_PATH) as cache:
+        if key in cache:
+            final_analysis, execution_log = cache[key]
+            if placeholder is not None:
+                placeholder.markdown(final_analysis)
+            return final_analysis, execution_log
+
+    final_analysis, execution_log = asyncio.run(
+        _run_with_client(api_key, query, model, placeholder, on_progress)
+    )
+
+    with shelve.open(ANALYSIS_CACHE_PATH) as cache:
+        cache[key] = (final_analysis, execution_log)
+
+    return final_analysis, execution_log
+
+
+# ------------------------- STREAMLIT UI ----------------------------
+
+st.title("📈 Forex Market Analyzer (Groq + Smart Money Concepts)")
+st.write("Analyze forex pairs using institutional logic (SMC) powered by Groq LLM.")
+
+# Example queries - a single selectbox instead of one button per example
+# keeps per-rerun widget registration and DOM diffing flat
+EXAMPLE_QUERIES = (
+    "Analyze EURUSD on 1h timeframe",
+    "Find order blocks on AUDUSD 1h",
+    "Detect liquidity sweeps on EURUSD 4h",
+    "Show me Fair Value Gaps on GBPJPY 1h",
+    "Find confluences on EURUSD 1h",
+    "Comprehensive SMC analysis EURUSD 1h",
+    "Find manipulation patterns GBPUSD 15m",
+    "Wyckoff phase analysis USDJPY 4h",
+    "Multi-timeframe analysis AUDUSD 1h",
+)
+
+example = st.sidebar.selectbox("Example queries", ("",) + EXAMPLE_QUERIES)
+
+
+@st.fragment
+def analysis_panel(example):
+    """Analysis inputs and output, isolated from the rest of the script
+
+    Running as a fragment means a Run Analysis click only re-executes this
+    section instead of the whole app.py module (header, sidebar, schema
+    definitions) top to bottom.
+    """
+
+    # A form batches widget edits into one rerun on submit, so changing the
+    # pair or retyping the query no longer re-executes even this fragment
+    with st.form("analysis_form"):
+        pair = st.selectbox("Select Forex Pair", ["EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "USDCAD"])
+        timeframe = st.selectbox("Select Timeframe", ["1m", "5m", "15m", "1h", "4h", "1d"])
+        query = st.text_area("Enter your analysis request",
+                             example or "Analyze today's EURUSD market structure, liquidity, and possible smart money setup.")
+        # Opt-in: default reruns skip trace serialization entirely
+        show_trace = st.checkbox("Show execution trace", value=False)
+        submitted = st.form_submit_button("🔍 Run Analysis")
+
+    if submitted:
+        api_key = get_groq_api_key()
+        if not api_key:
+            st.stop()
+
+        _, using_real_data = _forex_backend()
+        if not using_real_data:
+            st.caption("⚠️ Using mock data (install polygon-api-client for live Polygon.io data)")
+
+        try:
+            st.subheader("🧠 Analysis")
+            # st.status shows which tools each iteration is running while
+            # the streamed answer fills the placeholder below it
+            status = st.status("Analyzing with Groq LLM...")
+            placeholder = st.empty()
+            final_analysis, execution_log = cached_run_analysis(
+                api_key, query, placeholder=placeholder,
+                on_progress=lambda label: status.update(label=label)
+            )
+            status.update(label="Analysis complete", state="complete")
+
+            # Complete execution trace
+            if show_trace:
+                with st.expander("🔍 Execution Trace", expanded=False):
+                    for log_entry in execution_log:
+                        st.markdown(f"**Iteration {log_entry['iteration']}: `{log_entry['function']}`**")
+                        st.code(_pretty_result(log_entry['handle'], log_entry['preview']), language="json")
+
+        except Exception as e:
+            st.error(f"Error during Groq LLM call: {e}")
+
+
+analysis_panel(example)
 
 # Footer
 st.markdown("---")
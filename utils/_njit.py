@@ -0,0 +1,21 @@
+"""
+Optional numba shim
+===================
+
+Exposes `njit` so hot scan loops compile with numba where it is
+installed and run as plain Python where it is not. The kernels receive
+numpy arrays either way, so the fallback is just the undecorated
+function - numba stays out of the hard requirements.
+"""
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba not installed
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
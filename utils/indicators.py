@@ -0,0 +1,53 @@
+"""
+Shared Technical Indicators
+===========================
+
+Single home for the indicator math used by both data sources
+(polygon_api and polygon_mock previously carried duplicate copies).
+
+Uses TA-Lib's compiled implementations (proper Wilder smoothing) when the
+C extension is installed; falls back to vectorized numpy approximations
+so the app still runs without it.
+"""
+
+import numpy as np
+
+try:
+    import talib
+    _HAS_TALIB = True
+except ImportError:
+    _HAS_TALIB = False
+
+
+def calculate_rsi(prices, period=14):
+    """Calculate RSI over a close series, rounded to 2 decimals"""
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(prices) < period + 1:
+        return 50
+
+    if _HAS_TALIB:
+        return round(float(talib.RSI(prices, timeperiod=period)[-1]), 2)
+
+    # Fallback: simple average of the last `period` gains/losses
+    diff = np.diff(prices)[-period:]
+    avg_gain = np.clip(diff, 0, None).mean()
+    avg_loss = np.clip(-diff, 0, None).mean()
+
+    if avg_loss == 0:
+        return 100
+
+    rs = avg_gain / avg_loss
+    return round(float(100 - (100 / (1 + rs))), 2)
+
+
+def calculate_atr(highs, lows, closes, period=14):
+    """Calculate ATR over OHLC series, rounded to 4 decimals"""
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    closes = np.asarray(closes, dtype=np.float64)
+
+    if _HAS_TALIB and len(closes) > period:
+        return round(float(talib.ATR(highs, lows, closes, timeperiod=period)[-1]), 4)
+
+    # Fallback: mean bar range over the window (ignores gaps between bars)
+    return round(float((highs[-period:] - lows[-period:]).mean()), 4)
@@ -0,0 +1,84 @@
+"""
+Persistent OHLCV Store
+======================
+
+SQLite-backed candle cache. Historical bars are immutable, so each one
+only needs to be downloaded once: get_forex_data asks Polygon just for
+bars newer than the latest stored timestamp and reads its 100-bar window
+back from here, instead of re-downloading the full window every call.
+"""
+
+import os
+import sqlite3
+
+_DB_PATH = os.path.join('.cache', 'ohlcv.sqlite3')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    pair TEXT NOT NULL,
+    tf TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (pair, tf, ts)
+)
+"""
+
+_FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+def _connect():
+    """Open a connection, creating the database and table on first use
+
+    One short-lived connection per operation keeps the store safe to call
+    from worker threads without shared-connection locking.
+    """
+    os.makedirs(os.path.dirname(_DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(_DB_PATH)
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def latest_timestamp(pair, timeframe):
+    """Most recent stored bar timestamp (ISO string), or None if empty"""
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT MAX(ts) FROM candles WHERE pair = ? AND tf = ?",
+            (pair.upper(), timeframe)
+        ).fetchone()
+    return row[0] if row else None
+
+
+def store_candles(pair, timeframe, candles):
+    """Merge a batch of candle dicts into the store (refetched bars win)
+
+    Fetches include the still-forming bar, so an incoming row must
+    replace any stored version of the same timestamp - otherwise the
+    partial OHLCV captured mid-period would be frozen and served forever.
+    """
+    if not candles:
+        return
+    rows = [
+        (pair.upper(), timeframe, c['timestamp'],
+         c['open'], c['high'], c['low'], c['close'], c['volume'])
+        for c in candles
+    ]
+    with _connect() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+
+def load_candles(pair, timeframe, limit=100):
+    """Return the most recent `limit` candles, oldest first"""
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT ts, open, high, low, close, volume FROM candles"
+            " WHERE pair = ? AND tf = ? ORDER BY ts DESC LIMIT ?",
+            (pair.upper(), timeframe, limit)
+        ).fetchall()
+    return [dict(zip(_FIELDS, row)) for row in reversed(rows)]
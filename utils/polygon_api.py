@@ -8,189 +8,291 @@ Requires API key from polygon.io
 Get your FREE API key: https://polygon.io/dashboard/signup
 """
 
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 from polygon import RESTClient
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 
+from utils.indicators import calculate_rsi, calculate_atr
+from utils import ohlcv_store
+from utils.polygon_mock import get_forex_data as _mock_forex
+
+logger = logging.getLogger(__name__)
+
+# Minutes per candle, shared by the date-range and cache-TTL math
+_MINUTES_PER_CANDLE = {
+    '1m': 1, '5m': 5, '15m': 15, '30m': 30,
+    '1h': 60, '4h': 240, '1d': 1440
+}
+
+
+def _ttl_for(timeframe):
+    """Cache lifetime for a fetch in seconds: one bar, capped at an hour"""
+    return min(_MINUTES_PER_CANDLE.get(timeframe, 60) * 60, 3600)
+
+
+@functools.lru_cache(maxsize=4)
+def _client(api_key):
+    """One RESTClient per key - urllib3's pool keeps connections warm
+
+    Constructing a client per fetch forced a fresh TCP+TLS handshake on
+    every call; reusing one keeps the keep-alive connection open.
+    """
+    return RESTClient(api_key, connect_timeout=5, read_timeout=10)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _fetch_candles(_api_key, pair, timeframe, bucket):
+    """
+    Network portion of get_forex_data, cached for one bar duration
+
+    `bucket` advances every _ttl_for(timeframe) seconds, which gives a
+    per-timeframe TTL even though st.cache_data fixes ttl per function.
+    Raises on API problems so failures never populate the cache.
+    """
+    # 1m fast path: the shared snapshot call already carries every pair's
+    # latest minute bar, so a refresh with warm history skips aggs
+    # entirely (import deferred - polygon_snapshot imports our _client)
+    if timeframe == '1m':
+        from utils.polygon_snapshot import latest_minute_bar
+        try:
+            bar = latest_minute_bar(_api_key, pair)
+        except Exception:
+            bar = None
+        if bar is not None:
+            ohlcv_store.store_candles(pair, timeframe, [bar])
+            candles = ohlcv_store.load_candles(pair, timeframe, limit=100)
+            if len(candles) >= 100:
+                return candles
+
+    client = _client(_api_key)
+
+    # Convert pair format for Polygon (e.g., EURUSD -> C:EURUSD)
+    ticker = f"C:{pair.upper()}"
+
+    # Map timeframe to Polygon format
+    timeframe_map = {
+        '1m': (1, 'minute'),
+        '5m': (5, 'minute'),
+        '15m': (15, 'minute'),
+        '30m': (30, 'minute'),
+        '1h': (1, 'hour'),
+        '4h': (4, 'hour'),
+        '1d': (1, 'day')
+    }
+
+    multiplier, timespan = timeframe_map.get(timeframe, (1, 'hour'))
+
+    # Calculate date range (last 100 candles) - but never re-request bars
+    # already sitting in the on-disk store; in steady state only the
+    # newest bar or two come over the wire
+    to_date = datetime.now()
+    total_minutes = _MINUTES_PER_CANDLE.get(timeframe, 60) * 100
+    from_date = to_date - timedelta(minutes=total_minutes)
+
+    last_ts = ohlcv_store.latest_timestamp(pair, timeframe)
+    if last_ts:
+        from_date = max(from_date, datetime.fromisoformat(last_ts))
+
+    aggs = client.get_aggs(
+        ticker=ticker,
+        multiplier=multiplier,
+        timespan=timespan,
+        from_=from_date.strftime('%Y-%m-%d'),
+        to=to_date.strftime('%Y-%m-%d'),
+        limit=100
+    )
+
+    # Convert to our format - one bulk np.round per field instead of
+    # four Python round() calls per candle, and one vectorized pandas
+    # conversion for all timestamps (UTC, matching the store keys)
+    aggs = list(aggs or [])
+    n = len(aggs)
+    new_candles = []
+    if n:
+        fields = {
+            name: np.round(
+                np.fromiter((getattr(a, name) for a in aggs), dtype=np.float64, count=n), 4
+            ).tolist()
+            for name in ('open', 'high', 'low', 'close')
+        }
+        ts = np.fromiter((a.timestamp for a in aggs), dtype=np.int64, count=n)
+        ts_iso = pd.to_datetime(ts, unit='ms').strftime('%Y-%m-%dT%H:%M:%S').tolist()
+        new_candles = [
+            {
+                'timestamp': t,
+                'open': o, 'high': h, 'low': l, 'close': c,
+                'volume': a.volume
+            }
+            for a, t, o, h, l, c in zip(
+                aggs, ts_iso, fields['open'], fields['high'], fields['low'], fields['close']
+            )
+        ]
+
+    # Merge into the store and read the window back, so cached history
+    # still serves when the incremental request returns nothing new
+    ohlcv_store.store_candles(pair, timeframe, new_candles)
+    candles = ohlcv_store.load_candles(pair, timeframe, limit=100)
+
+    if not candles:
+        raise ValueError(f"No data returned from Polygon for {pair}")
+
+    return candles
+
+def _candle_arrays(candles):
+    """
+    Columnar (structure-of-arrays) view of a candle list
+
+    Built once per fetch so the SMC functions can vectorize over numpy
+    arrays instead of re-walking the list of dicts field by field.
+    np.fromiter with a known count writes each column straight into its
+    preallocated buffer - no intermediate Python lists.
+    """
+    n = len(candles)
+    return {
+        field: np.fromiter((c[field] for c in candles), dtype=np.float64, count=n)
+        for field in ('open', 'high', 'low', 'close', 'volume')
+    }
+
+def build_market_data(pair, timeframe, candles, source='polygon.io'):
+    """
+    Assemble the market-data dict (indicators + context) from candles
+
+    Shared by the sync and async fetch paths so both return the exact
+    same shape. Indicators run as one numpy pass per stat instead of
+    per-element Python loops over the candle dicts.
+    """
+    arrays = _candle_arrays(candles)
+    closes = arrays['close']
+    current_price = float(closes[-1])
+
+    # RSI calculation
+    rsi = calculate_rsi(closes)
+
+    # Trend detection
+    recent_closes = closes[-20:]
+    trend = "bullish" if recent_closes[-1] > recent_closes[0] else "bearish"
+
+    # ATR (Average True Range)
+    atr = calculate_atr(arrays['high'], arrays['low'], closes)
+
+    # Support and Resistance - O(n) selection of the 5 extreme levels
+    # via np.partition instead of a full sort
+    recent_highs = arrays['high'][-50:]
+    recent_lows = arrays['low'][-50:]
+    k = min(5, len(recent_lows))
+
+    support_level = round(float(np.partition(recent_lows, k - 1)[:k].mean()), 4)
+    resistance_level = round(float(np.partition(recent_highs, -k)[-k:].mean()), 4)
+
+    return {
+        'pair': pair.upper(),
+        'timeframe': timeframe,
+        'current_price': current_price,
+        'candles': candles,
+        '_arrays': arrays,
+        'indicators': {
+            'rsi': rsi,
+            'atr': atr,
+            'trend': trend,
+            'support': support_level,
+            'resistance': resistance_level
+        },
+        'market_context': {
+            'volatility': 'high' if atr > 0.01 else 'normal',
+            'session': get_market_session(),
+            'momentum': 'strong' if abs(rsi - 50) > 20 else 'weak'
+        },
+        'metadata': {
+            'data_points': len(candles),
+            'timestamp': datetime.now().isoformat(),
+            'source': source
+        }
+    }
+
+def _mock_fallback(pair, timeframe, message):
+    """Mock data carrying a 'warnings' entry explaining the fallback"""
+    data = _mock_forex(pair, timeframe)
+    data.setdefault('warnings', []).append(message)
+    return data
+
 def get_forex_data(pair, timeframe):
     """
     Fetch real forex data from Polygon.io
-    
+
     Args:
         pair (str): Forex pair (e.g., 'EURUSD', 'GBPUSD')
         timeframe (str): Chart timeframe ('1m', '5m', '15m', '30m', '1h', '4h', '1d')
     
     Returns:
-        dict: Market data with OHLCV, indicators, and context
+        dict: Market data with OHLCV, indicators, and context.
+        Problems are logged and reported under a 'warnings' key instead
+        of rendered here, so this stays callable from worker threads and
+        background prefetches; the UI layer surfaces the messages.
     """
-    
+
     try:
         # Get API key from Streamlit secrets
         api_key = st.secrets.get("POLYGON_API_KEY")
-        
+
         if not api_key:
             # Fallback to mock data if no API key
-            st.warning("⚠️ No Polygon API key found. Using mock data. Add POLYGON_API_KEY to secrets for real data.")
-            from utils.polygon_mock import get_forex_data as mock_data
-            return mock_data(pair, timeframe)
-        
-        # Initialize Polygon client
-        client = RESTClient(api_key)
-        
-        # Convert pair format for Polygon (e.g., EURUSD -> C:EURUSD)
-        ticker = f"C:{pair.upper()}"
-        
-        # Map timeframe to Polygon format
-        timeframe_map = {
-            '1m': (1, 'minute'),
-            '5m': (5, 'minute'),
-            '15m': (15, 'minute'),
-            '30m': (30, 'minute'),
-            '1h': (1, 'hour'),
-            '4h': (4, 'hour'),
-            '1d': (1, 'day')
-        }
-        
-        multiplier, timespan = timeframe_map.get(timeframe, (1, 'hour'))
-        
-        # Calculate date range (last 100 candles)
-        to_date = datetime.now()
-        
-        # Calculate from_date based on timeframe
-        minutes_per_candle = {
-            '1m': 1, '5m': 5, '15m': 15, '30m': 30,
-            '1h': 60, '4h': 240, '1d': 1440
-        }
-        
-        total_minutes = minutes_per_candle.get(timeframe, 60) * 100
-        from_date = to_date - timedelta(minutes=total_minutes)
-        
-        # Format dates for Polygon API
-        from_str = from_date.strftime('%Y-%m-%d')
-        to_str = to_date.strftime('%Y-%m-%d')
-        
-        # Fetch data from Polygon
+            logger.warning("No Polygon API key configured; using mock data")
+            return _mock_fallback(
+                pair, timeframe,
+                "No Polygon API key found. Using mock data. "
+                "Add POLYGON_API_KEY to secrets for real data."
+            )
+
+        # Fetch data from Polygon, served from cache while the current
+        # bar is still forming
         try:
-            aggs = client.get_aggs(
-                ticker=ticker,
-                multiplier=multiplier,
-                timespan=timespan,
-                from_=from_str,
-                to=to_str,
-                limit=100
+            candles = _fetch_candles(
+                api_key, pair, timeframe,
+                int(time.time() // _ttl_for(timeframe))
             )
-            
-            # Check if we got data
-            if not aggs or len(aggs) == 0:
-                st.warning(f"⚠️ No data returned from Polygon for {pair}. Using mock data.")
-                from utils.polygon_mock import get_forex_data as mock_data
-                return mock_data(pair, timeframe)
-            
-            # Convert to our format
-            candles = []
-            for agg in aggs:
-                candles.append({
-                    'timestamp': datetime.fromtimestamp(agg.timestamp / 1000).isoformat(),
-                    'open': round(agg.open, 4),
-                    'high': round(agg.high, 4),
-                    'low': round(agg.low, 4),
-                    'close': round(agg.close, 4),
-                    'volume': agg.volume
-                })
-            
-            # Calculate indicators
-            closes = [c['close'] for c in candles]
-            current_price = closes[-1]
-            
-            # RSI calculation
-            rsi = calculate_rsi(closes)
-            
-            # Trend detection
-            recent_closes = closes[-20:]
-            trend = "bullish" if recent_closes[-1] > recent_closes[0] else "bearish"
-            
-            # ATR (Average True Range)
-            highs = [c['high'] for c in candles[-14:]]
-            lows = [c['low'] for c in candles[-14:]]
-            atr = round(sum([h - l for h, l in zip(highs, lows)]) / len(highs), 4)
-            
-            # Support and Resistance
-            recent_highs = sorted([c['high'] for c in candles[-50:]], reverse=True)
-            recent_lows = sorted([c['low'] for c in candles[-50:]])
-            
-            support_level = round(sum(recent_lows[:5]) / 5, 4)
-            resistance_level = round(sum(recent_highs[:5]) / 5, 4)
-            
-            return {
-                'pair': pair.upper(),
-                'timeframe': timeframe,
-                'current_price': current_price,
-                'candles': candles,
-                'indicators': {
-                    'rsi': rsi,
-                    'atr': atr,
-                    'trend': trend,
-                    'support': support_level,
-                    'resistance': resistance_level
-                },
-                'market_context': {
-                    'volatility': 'high' if atr > 0.01 else 'normal',
-                    'session': get_market_session(),
-                    'momentum': 'strong' if abs(rsi - 50) > 20 else 'weak'
-                },
-                'metadata': {
-                    'data_points': len(candles),
-                    'timestamp': datetime.now().isoformat(),
-                    'source': 'polygon.io'
-                }
-            }
-            
+            return build_market_data(pair, timeframe, candles)
+
         except Exception as api_error:
-            st.error(f"❌ Polygon API Error: {str(api_error)}")
-            st.info("Falling back to mock data...")
-            from utils.polygon_mock import get_forex_data as mock_data
-            return mock_data(pair, timeframe)
-    
+            logger.warning("Polygon API error for %s %s: %s", pair, timeframe, api_error)
+            return _mock_fallback(
+                pair, timeframe,
+                f"Polygon API error: {api_error}. Falling back to mock data."
+            )
+
     except Exception as e:
-        st.error(f"❌ Error initializing Polygon client: {str(e)}")
-        st.info("Using mock data...")
-        from utils.polygon_mock import get_forex_data as mock_data
-        return mock_data(pair, timeframe)
-
-def calculate_rsi(prices, period=14):
-    """Calculate RSI indicator"""
-    if len(prices) < period:
-        return 50
-    
-    gains = []
-    losses = []
-    
-    for i in range(1, len(prices)):
-        change = prices[i] - prices[i-1]
-        gains.append(max(change, 0))
-        losses.append(max(-change, 0))
-    
-    avg_gain = sum(gains[-period:]) / period
-    avg_loss = sum(losses[-period:]) / period
-    
-    if avg_loss == 0:
-        return 100
-    
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    
-    return round(rsi, 2)
+        logger.exception("Error initializing Polygon client")
+        return _mock_fallback(
+            pair, timeframe,
+            f"Error initializing Polygon client: {e}. Using mock data."
+        )
+
+def get_forex_data_batch(pairs, timeframe):
+    """
+    Fetch market data for several pairs concurrently
+
+    The underlying sockets release the GIL during I/O, so a small thread
+    pool turns N serial HTTP round-trips into roughly one. Returns a dict
+    keyed by upper-cased pair, preserving input order.
+    """
+    if not pairs:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(8, len(pairs))) as executor:
+        results = list(executor.map(lambda p: get_forex_data(p, timeframe), pairs))
+
+    return dict(zip([p.upper() for p in pairs], results))
+
+# Session per UTC hour - a tuple index replaces the if/elif range chain
+_SESSIONS = ('asian',) * 8 + ('london',) * 8 + ('newyork',) * 8
+
 
 def get_market_session():
     """Determine current market session based on UTC time"""
-    hour = datetime.utcnow().hour
-    
-    if 0 <= hour < 8:
-        return 'asian'
-    elif 8 <= hour < 16:
-        return 'london'
-    elif 16 <= hour < 24:
-        return 'newyork'
-    else:
-        return 'unknown'
\ No newline at end of file
+    return _SESSIONS[datetime.utcnow().hour]
\ No newline at end of file
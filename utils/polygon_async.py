@@ -0,0 +1,116 @@
+"""
+Async Polygon.io Fetches
+========================
+
+httpx-based async path for pulling several pairs concurrently without a
+thread per request. Hits the aggs endpoint directly, parses with orjson,
+and reuses the indicator assembly from utils.polygon_api so both paths
+return the exact same data shape.
+
+No mock fallback here - callers that want it should catch and fall back
+themselves (the sync get_forex_data keeps its fallback behavior).
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import numpy as np
+import orjson
+import pandas as pd
+import streamlit as st
+
+from utils.polygon_api import _MINUTES_PER_CANDLE, build_market_data
+
+_BASE_URL = "https://api.polygon.io"
+
+_TIMEFRAME_MAP = {
+    '1m': (1, 'minute'),
+    '5m': (5, 'minute'),
+    '15m': (15, 'minute'),
+    '30m': (30, 'minute'),
+    '1h': (1, 'hour'),
+    '4h': (4, 'hour'),
+    '1d': (1, 'day')
+}
+
+def _make_client():
+    """HTTP/2 client for one batch - all fetches multiplex over it
+
+    Created per event loop rather than per process: httpx pools
+    connections on the loop that opened them, and run_batch spins up a
+    fresh loop per call, so a client surviving across runs would serve
+    connections bound to a closed loop.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(10.0, connect=5.0),
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    )
+
+
+async def get_forex_data_async(client, pair, timeframe):
+    """
+    Async variant of polygon_api.get_forex_data
+
+    Raises on missing API key, HTTP errors, or empty responses. The
+    caller owns `client` and its lifecycle (see run_batch).
+    """
+    api_key = st.secrets.get("POLYGON_API_KEY")
+    if not api_key:
+        raise RuntimeError("POLYGON_API_KEY not configured")
+
+    multiplier, timespan = _TIMEFRAME_MAP.get(timeframe, (1, 'hour'))
+    to_date = datetime.now()
+    total_minutes = _MINUTES_PER_CANDLE.get(timeframe, 60) * 100
+    from_date = to_date - timedelta(minutes=total_minutes)
+
+    url = (
+        f"{_BASE_URL}/v2/aggs/ticker/C:{pair.upper()}/range/"
+        f"{multiplier}/{timespan}/{from_date:%Y-%m-%d}/{to_date:%Y-%m-%d}"
+    )
+    response = await client.get(url, params={"limit": 100, "apiKey": api_key})
+    response.raise_for_status()
+    payload = orjson.loads(await response.aread())
+
+    bars = payload.get('results') or []
+    n = len(bars)
+    fields = {
+        key: np.round(
+            np.fromiter((bar[key] for bar in bars), dtype=np.float64, count=n), 4
+        ).tolist()
+        for key in ('o', 'h', 'l', 'c')
+    }
+    ts = np.fromiter((bar['t'] for bar in bars), dtype=np.int64, count=n)
+    ts_iso = pd.to_datetime(ts, unit='ms').strftime('%Y-%m-%dT%H:%M:%S').tolist()
+    candles = [
+        {
+            'timestamp': t,
+            'open': o, 'high': h, 'low': l, 'close': c,
+            'volume': bar['v']
+        }
+        for bar, t, o, h, l, c in zip(
+            bars, ts_iso, fields['o'], fields['h'], fields['l'], fields['c']
+        )
+    ]
+
+    if not candles:
+        raise ValueError(f"No data returned from Polygon for {pair}")
+
+    return build_market_data(pair, timeframe, candles)
+
+
+def run_batch(pairs, timeframe):
+    """
+    Sync wrapper: fetch all pairs concurrently, return {pair: data}
+
+    For use from Streamlit script code, which runs outside an event loop.
+    """
+    async def _gather():
+        async with _make_client() as client:
+            return await asyncio.gather(
+                *(get_forex_data_async(client, pair, timeframe) for pair in pairs)
+            )
+
+    results = asyncio.run(_gather())
+    return dict(zip([p.upper() for p in pairs], results))
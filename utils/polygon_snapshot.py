@@ -0,0 +1,41 @@
+"""
+Polygon Forex Snapshot
+======================
+
+One call to the snapshot endpoint returns the latest state of every
+forex ticker. For 1m refreshes that replaces a per-pair aggs request
+with a shared, 60s-cached lookup - N HTTP calls become 1.
+"""
+
+from datetime import datetime
+
+import streamlit as st
+
+from utils.polygon_api import _client
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_all_snapshot(_api_key):
+    """Latest snapshot of all forex tickers, keyed by 6-letter pair"""
+    snapshot = {}
+    for ticker in _client(_api_key).get_snapshot_all("forex"):
+        name = (ticker.ticker or '').replace('C:', '')
+        snapshot[name] = ticker
+    return snapshot
+
+
+def latest_minute_bar(api_key, pair):
+    """The snapshot's last minute bar for a pair as a candle dict, or None"""
+    ticker = get_all_snapshot(api_key).get(pair.upper())
+    bar = getattr(ticker, 'min', None)
+    if bar is None or bar.timestamp is None:
+        return None
+    return {
+        # UTC to match the timestamps written by the aggs fetch path
+        'timestamp': datetime.utcfromtimestamp(bar.timestamp / 1000).isoformat(),
+        'open': round(bar.open, 4),
+        'high': round(bar.high, 4),
+        'low': round(bar.low, 4),
+        'close': round(bar.close, 4),
+        'volume': bar.volume
+    }
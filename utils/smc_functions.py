@@ -16,13 +16,125 @@ Comprehensive implementation of ALL major SMC concepts:
 All functions use mock logic but return realistic data structures.
 """
 
+import functools
+import heapq
+import math
 import random
+import time
 from datetime import datetime, timedelta
 
+import numpy as np
+
+from utils._njit import njit
+
+# ============================================================================
+# SHARED HELPERS
+# ============================================================================
+
+# Shared numpy Generator - bulk sampling without Mersenne Twister state
+# churn on every call
+_RNG = np.random.default_rng()
+
+def _candle_arrays(data):
+    """
+    Columnar highs/lows/closes for a market-data dict, computed once
+
+    The data sources attach this under '_arrays'; when a caller passes a
+    bare dict, it's rebuilt here and cached on the dict so every detector
+    in a request shares one conversion instead of re-running per-field
+    comprehensions over the candle list.
+    """
+    arrays = data.get('_arrays')
+    if arrays is None:
+        candles = data.get('candles', [])
+        n = len(candles)
+        arrays = {
+            field: np.fromiter((c[field] for c in candles), dtype=np.float64, count=n)
+            for field in ('open', 'high', 'low', 'close', 'volume')
+        }
+        data['_arrays'] = arrays
+    return arrays
+
+def requires_candles(min_n, message='Insufficient data', **empty_fields):
+    """Short-circuit a detector when the data has too few candles
+
+    Replaces the identical length-guard preamble at the top of every
+    detector: the wrapped function only runs when data carries at least
+    `min_n` candles, otherwise the caller gets the detector's empty
+    payload plus the standard message. Mutable payload values are
+    copied so callers can't poison the shared template.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(data, *args, **kwargs):
+            if len(data.get('candles', ())) < min_n:
+                empty = {
+                    key: value.copy() if hasattr(value, 'copy') else value
+                    for key, value in empty_fields.items()
+                }
+                empty['message'] = message
+                return empty
+            return func(data, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def _window_stats(data, n):
+    """Tail-window high/low/volume reductions, memoized on the data dict
+
+    Analyzers composing a full SMC report reduce the same tail windows
+    repeatedly; the first caller pays for the scan, the rest hit the
+    cache under data['_cache'] (stripped before payloads reach the LLM,
+    alongside '_arrays').
+    """
+    cache = data.setdefault('_cache', {})
+    key = ('window', n)
+    stats = cache.get(key)
+    if stats is None:
+        arrays = _candle_arrays(data)
+        stats = {
+            'high': float(arrays['high'][-n:].max()),
+            'low': float(arrays['low'][-n:].min()),
+            'volume': float(arrays['volume'][-n:].sum()),
+        }
+        cache[key] = stats
+    return stats
+
+# Display names for the finite type vocabularies - a dict lookup replaces
+# the replace()/title() string churn in every interpretation f-string
+_PRETTY = {t: t.replace('_', ' ').title() for t in (
+    'buy_side', 'sell_side',
+    'central_bank', 'employment', 'inflation', 'gdp',
+    'bull_trap', 'bear_trap', 'stop_hunt', 'false_breakout',
+    'wyckoff_spring', 'wyckoff_upthrust',
+)}
+_SPACED = {t: t.replace('_', ' ') for t in (
+    'above_highs', 'below_lows', 'equal_highs', 'equal_lows',
+    'bearish_reversal', 'bullish_reversal', 'continuation',
+    'spike_up', 'spike_down', 'range_expansion',
+    'potential_reversal_up', 'potential_reversal_down',
+    'strong_buying', 'strong_selling',
+    'moderate_buying', 'moderate_selling', 'balanced',
+)}
+
+def _unpack(data):
+    """Destructure the fields every detector needs in one dict walk
+
+    Replaces the repeated data.get(...).get(...) chains at each entry
+    point; callers just ignore the fields they don't use.
+    """
+    indicators = data.get('indicators', {})
+    return (
+        data.get('candles', []),
+        data.get('current_price', 0),
+        indicators.get('trend', 'neutral'),
+        indicators.get('rsi', 50),
+    )
+
 # ============================================================================
 # MARKET STRUCTURE FUNCTIONS
 # ============================================================================
 
+@requires_candles(20, detected=False, message='Insufficient data for BOS detection')
 def detect_bos(data, timeframe):
     """
     Detect Break of Structure - confirms trend direction
@@ -31,24 +143,19 @@ def detect_bos(data, timeframe):
     swing low (bearish), indicating trend continuation.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    trend = data.get('indicators', {}).get('trend', 'neutral')
-    
-    if len(candles) < 20:
-        return {'detected': False, 'message': 'Insufficient data for BOS detection'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     bos_probability = random.random()
     
     if bos_probability > 0.4:
         direction = 'bullish' if trend == 'bullish' else 'bearish'
-        recent_candles = candles[-20:]
-        
+        arrays = _candle_arrays(data)
+
         if direction == 'bullish':
-            bos_level = max([c['high'] for c in recent_candles[:-5]])
+            bos_level = float(arrays['high'][-20:-5].max())
             structure_type = 'swing_high'
         else:
-            bos_level = min([c['low'] for c in recent_candles[:-5]])
+            bos_level = float(arrays['low'][-20:-5].min())
             structure_type = 'swing_low'
         
         price_distance = abs(current_price - bos_level) / bos_level
@@ -75,6 +182,7 @@ def detect_bos(data, timeframe):
             'recommendation': 'Wait for clearer structure formation'
         }
 
+@requires_candles(30, detected=False, message='Insufficient data for CHoCH detection')
 def detect_choch(data):
     """
     Detect Change of Character - identifies potential reversals
@@ -83,13 +191,7 @@ def detect_choch(data):
     new low (in downtrend), signaling potential trend change.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    trend = data.get('indicators', {}).get('trend', 'neutral')
-    rsi = data.get('indicators', {}).get('rsi', 50)
-    
-    if len(candles) < 30:
-        return {'detected': False, 'message': 'Insufficient data for CHoCH detection'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     choch_probability = random.random()
     
@@ -98,14 +200,14 @@ def detect_choch(data):
     
     if choch_probability > 0.5:
         reversal_direction = 'bearish' if trend == 'bullish' else 'bullish'
-        recent_candles = candles[-15:]
-        
+        arrays = _candle_arrays(data)
+
         if reversal_direction == 'bearish':
-            failure_point = max([c['high'] for c in recent_candles[:10]])
-            trigger_level = min([c['low'] for c in recent_candles[10:]])
+            failure_point = float(arrays['high'][-15:-5].max())
+            trigger_level = float(arrays['low'][-5:].min())
         else:
-            failure_point = min([c['low'] for c in recent_candles[:10]])
-            trigger_level = max([c['high'] for c in recent_candles[10:]])
+            failure_point = float(arrays['low'][-15:-5].min())
+            trigger_level = float(arrays['high'][-5:].max())
         
         strength_factors = []
         if (reversal_direction == 'bearish' and rsi > 70) or (reversal_direction == 'bullish' and rsi < 30):
@@ -138,6 +240,7 @@ def detect_choch(data):
             'recommendation': 'Continue trading with the trend'
         }
 
+@requires_candles(25, detected=False, message='Insufficient data for MSB detection')
 def detect_market_structure_break(data):
     """
     Detect Market Structure Break (MSB) - similar to BOS but more aggressive
@@ -145,22 +248,17 @@ def detect_market_structure_break(data):
     MSB is a strong break of recent market structure indicating powerful momentum.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    trend = data.get('indicators', {}).get('trend', 'neutral')
-    
-    if len(candles) < 25:
-        return {'detected': False, 'message': 'Insufficient data for MSB detection'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     if random.random() > 0.6:
         direction = 'bullish' if trend == 'bullish' else 'bearish'
-        recent_candles = candles[-25:]
-        
+        arrays = _candle_arrays(data)
+
         if direction == 'bullish':
-            msb_level = max([c['high'] for c in recent_candles[:15]])
+            msb_level = float(arrays['high'][-25:-10].max())
             break_distance = current_price - msb_level
         else:
-            msb_level = min([c['low'] for c in recent_candles[:15]])
+            msb_level = float(arrays['low'][-25:-10].min())
             break_distance = msb_level - current_price
         
         momentum_strength = random.randint(70, 95)
@@ -181,6 +279,7 @@ def detect_market_structure_break(data):
 # LIQUIDITY ANALYSIS FUNCTIONS
 # ============================================================================
 
+@requires_candles(30, sweeps=[])
 def detect_liquidity_sweep(data):
     """
     Detect Liquidity Sweep - when price hunts stops above/below key levels
@@ -188,36 +287,36 @@ def detect_liquidity_sweep(data):
     Smart money often sweeps liquidity (stop losses) before reversing.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    
-    if len(candles) < 30:
-        return {'sweeps': [], 'message': 'Insufficient data'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     sweeps = []
     num_sweeps = random.randint(0, 2)
-    
+    arrays = _candle_arrays(data)
+
+    # One batched draw per quantity instead of three RNG calls per sweep
+    type_draws = _RNG.random(num_sweeps)
+    candle_picks = _RNG.integers(5, 16, size=num_sweeps)
+    reaction_draws = _RNG.random(num_sweeps)
+
     for i in range(num_sweeps):
-        sweep_type = random.choice(['buy_side', 'sell_side'])
+        sweep_type = 'buy_side' if type_draws[i] < 0.5 else 'sell_side'
         lookback = 30 + (i * 10)
-        relevant_candles = candles[-lookback:-lookback+15]
-        
+        sweep_candle = candles[-int(candle_picks[i])]
+
         if sweep_type == 'buy_side':
-            liquidity_level = max([c['high'] for c in relevant_candles])
-            sweep_candle = candles[-random.randint(5, 15)]
-            reaction = 'bearish_reversal' if random.random() > 0.4 else 'continuation'
+            liquidity_level = float(arrays['high'][-lookback:-lookback+15].max())
+            reaction = 'bearish_reversal' if reaction_draws[i] > 0.4 else 'continuation'
         else:
-            liquidity_level = min([c['low'] for c in relevant_candles])
-            sweep_candle = candles[-random.randint(5, 15)]
-            reaction = 'bullish_reversal' if random.random() > 0.4 else 'continuation'
-        
+            liquidity_level = float(arrays['low'][-lookback:-lookback+15].min())
+            reaction = 'bullish_reversal' if reaction_draws[i] > 0.4 else 'continuation'
+
         sweeps.append({
             'type': sweep_type,
             'liquidity_level': round(liquidity_level, 4),
             'sweep_time': sweep_candle['timestamp'],
             'reaction': reaction,
             'distance_from_current': round(abs(current_price - liquidity_level) * 10000, 1),
-            'interpretation': f"{sweep_type.replace('_', ' ').title()} liquidity swept - watch for {reaction.replace('_', ' ')}"
+            'interpretation': f"{_PRETTY[sweep_type]} liquidity swept - watch for {_SPACED[reaction]}"
         })
     
     return {
@@ -226,6 +325,9 @@ def detect_liquidity_sweep(data):
         'trading_context': 'Liquidity sweeps often precede reversals' if sweeps else 'No recent liquidity sweeps'
     }
 
+_POOL_TYPES = ('above_highs', 'below_lows', 'equal_highs', 'equal_lows')
+
+@requires_candles(40, pools=[])
 def identify_liquidity_pools(data):
     """
     Identify Liquidity Pools - areas with concentrated stop losses
@@ -233,40 +335,40 @@ def identify_liquidity_pools(data):
     These are common reversal points where smart money enters.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    
-    if len(candles) < 40:
-        return {'pools': [], 'message': 'Insufficient data'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     pools = []
     num_pools = random.randint(1, 3)
-    
+    arrays = _candle_arrays(data)
+
+    # Batched draws: one type pick and one magnetism value per pool
+    type_picks = _RNG.integers(0, 4, size=num_pools)
+    magnetisms = _RNG.integers(60, 91, size=num_pools)
+
     for i in range(num_pools):
-        pool_type = random.choice(['above_highs', 'below_lows', 'equal_highs', 'equal_lows'])
-        
+        pool_type = _POOL_TYPES[type_picks[i]]
+
         lookback_start = 15 + (i * 15)
         lookback_end = lookback_start + 20
-        relevant_candles = candles[-lookback_end:-lookback_start]
-        
+
         if 'high' in pool_type:
-            highs = [c['high'] for c in relevant_candles]
-            pool_level = max(highs)
-            density = len([h for h in highs if abs(h - pool_level) / pool_level < 0.0003])
+            highs = arrays['high'][-lookback_end:-lookback_start]
+            pool_level = float(highs.max())
+            density = int(np.count_nonzero(np.abs(highs - pool_level) < pool_level * 0.0003))
         else:
-            lows = [c['low'] for c in relevant_candles]
-            pool_level = min(lows)
-            density = len([l for l in lows if abs(l - pool_level) / pool_level < 0.0003])
-        
-        magnetism = random.randint(60, 90)
+            lows = arrays['low'][-lookback_end:-lookback_start]
+            pool_level = float(lows.min())
+            density = int(np.count_nonzero(np.abs(lows - pool_level) < pool_level * 0.0003))
         
+        magnetism = int(magnetisms[i])
+
         pools.append({
             'type': pool_type,
             'level': round(pool_level, 4),
             'density': density,
             'magnetism': magnetism,
             'distance_pips': round(abs(current_price - pool_level) * 10000, 1),
-            'interpretation': f"Liquidity pool {pool_type.replace('_', ' ')} - expect price attraction"
+            'interpretation': f"Liquidity pool {_SPACED[pool_type]} - expect price attraction"
         })
     
     pools.sort(key=lambda x: x['distance_pips'])
@@ -277,42 +379,56 @@ def identify_liquidity_pools(data):
         'recommendation': 'Watch for price to reach and react at these liquidity levels'
     }
 
+@njit(cache=True)
+def _scan_voids(highs, lows, gates, start, stop):
+    """
+    Compiled void scan: (index, void_high, void_low) per gated gap
+
+    Pure array arithmetic so numba can lower the whole loop to machine
+    code; the dict/timestamp assembly stays in the Python wrapper.
+    """
+    out = []
+    for i in range(start, stop, -1):
+        if gates[i]:
+            void_high = lows[i - 1]
+            void_low = highs[i]
+            if void_high > void_low and (void_high - void_low) * 10000 > 5:
+                out.append((i, void_high, void_low))
+    return out
+
+@requires_candles(30, voids=[])
 def detect_liquidity_void(data):
     """
     Detect Liquidity Voids - price gaps with no trading activity
-    
+
     Voids often get filled as price revisits these areas.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    
-    if len(candles) < 30:
-        return {'voids': [], 'message': 'Insufficient data'}
-    
+    candles, current_price, trend, rsi = _unpack(data)
+
     voids = []
-    
-    for i in range(len(candles) - 5, len(candles) - 25, -1):
-        if random.random() > 0.85:  # 15% chance of void
-            void_high = candles[i-1]['low']
-            void_low = candles[i]['high']
-            
-            if void_high > void_low:  # Valid void
-                void_size_pips = (void_high - void_low) * 10000
-                
-                if void_size_pips > 5:  # Significant void
-                    fill_probability = random.randint(70, 95)
-                    
-                    voids.append({
-                        'void_high': round(void_high, 4),
-                        'void_low': round(void_low, 4),
-                        'void_midpoint': round((void_high + void_low) / 2, 4),
-                        'size_pips': round(void_size_pips, 1),
-                        'timestamp': candles[i]['timestamp'],
-                        'fill_probability': fill_probability,
-                        'status': 'unfilled',
-                        'interpretation': f"Liquidity void of {round(void_size_pips, 1)} pips - likely to be filled"
-                    })
+    arrays = _candle_arrays(data)
+    highs, lows = arrays['high'], arrays['low']
+
+    # Gate draws happen up front as one numpy batch; the scan itself is
+    # a compiled kernel over the raw arrays (see _scan_voids)
+    n = len(candles)
+    gates = _RNG.random(n) > 0.85  # 15% chance of void
+    fill_probs = _RNG.integers(70, 96, size=n)
+    for i, void_high, void_low in _scan_voids(highs, lows, gates, n - 5, n - 25):
+        void_size_pips = (void_high - void_low) * 10000
+        fill_probability = int(fill_probs[i])
+
+        voids.append({
+            'void_high': round(void_high, 4),
+            'void_low': round(void_low, 4),
+            'void_midpoint': round((void_high + void_low) / 2, 4),
+            'size_pips': round(void_size_pips, 1),
+            'timestamp': candles[i]['timestamp'],
+            'fill_probability': fill_probability,
+            'status': 'unfilled',
+            'interpretation': f"Liquidity void of {round(void_size_pips, 1)} pips - likely to be filled"
+        })
     
     return {
         'voids': voids[:3],  # Return top 3
@@ -324,70 +440,114 @@ def detect_liquidity_void(data):
 # ORDER BLOCKS & FAIR VALUE GAPS
 # ============================================================================
 
+# Pre-interned result keys: dict(zip(...)) over a constant key tuple
+# skips the per-key hashing of a literal with 10+ string keys per item
+_OB_KEYS = (
+    'type', 'zone_high', 'zone_low', 'price_level', 'strength', 'validity',
+    'freshness', 'distance_pips', 'timestamp', 'interpretation', 'trading_setup'
+)
+
+# Interpretation strings have two possible values each - precomputed so
+# the loops do a dict lookup instead of capitalize/ternary/format work
+_OB_INTERPRETATION = {
+    'demand': 'Demand zone - expect buying pressure',
+    'supply': 'Supply zone - expect selling pressure'
+}
+
+@requires_candles(50, order_blocks=[])
 def identify_order_blocks(data):
     """
     Identify institutional order blocks (demand/supply zones)
-    
+
     Order blocks are areas where institutions placed large orders.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    trend = data.get('indicators', {}).get('trend', 'neutral')
-    
-    if len(candles) < 50:
-        return {'order_blocks': [], 'message': 'Insufficient data'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     num_blocks = random.randint(2, 4)
     order_blocks = []
-    
+    arrays = _candle_arrays(data)
+
+    # All random draws for the loop batched up front
+    type_draws = _RNG.random(num_blocks)
+    tested_draws = _RNG.random(num_blocks) > 0.6
+    strengths = _RNG.integers(60, 96, size=num_blocks)
+
+    # trend is loop-invariant, so resolve the preferred/alternate block
+    # types once instead of string-comparing per block
+    preferred, alt = ('demand', 'supply') if trend == 'bullish' else ('supply', 'demand')
+
+    # Phase 1: structural picks only; distances come later in one pass
+    picked = []
     for i in range(num_blocks):
-        if trend == 'bullish':
-            block_type = 'demand' if random.random() > 0.3 else 'supply'
-        else:
-            block_type = 'supply' if random.random() > 0.3 else 'demand'
-        
+        block_type = preferred if type_draws[i] > 0.3 else alt
+
         lookback_start = 10 + (i * 15)
         lookback_end = lookback_start + 15
-        relevant_candles = candles[-lookback_end:-lookback_start] if lookback_start < len(candles) else candles[-lookback_end:]
-        
-        if not relevant_candles:
+
+        # The base candle is picked by index from a window, so carry the
+        # absolute index instead of rediscovering it later with
+        # candles.index() - an O(n) dict-equality scan per block that
+        # also collides on duplicate candles
+        slice_start = max(0, len(candles) - lookback_end)
+        slice_stop = len(candles) - lookback_start if lookback_start < len(candles) else len(candles)
+
+        if slice_stop <= slice_start:
             continue
-        
-        base_candle = relevant_candles[random.randint(0, len(relevant_candles)-1)]
-        
+
+        candle_index = slice_start + random.randrange(slice_stop - slice_start)
+
         if block_type == 'demand':
-            zone_high = base_candle['high']
-            zone_low = base_candle['low'] * 0.9995
-            price_level = round((zone_high + zone_low) / 2, 4)
+            zone_high = float(arrays['high'][candle_index])
+            zone_low = float(arrays['low'][candle_index]) * 0.9995
         else:
-            zone_high = base_candle['high'] * 1.0005
-            zone_low = base_candle['low']
-            price_level = round((zone_high + zone_low) / 2, 4)
-        
-        strength_score = random.randint(60, 95)
-        distance_pips = abs(current_price - price_level) * 10000
-        is_tested = random.random() > 0.6
-        validity = 'untested' if not is_tested else 'tested_once'
-        
-        candle_index = candles.index(base_candle)
+            zone_high = float(arrays['high'][candle_index]) * 1.0005
+            zone_low = float(arrays['low'][candle_index])
+
+        picked.append((i, block_type, zone_high, zone_low, candle_index))
+
+    # Phase 2: all per-block arithmetic - midpoints, distances, stops and
+    # targets - runs as fused array expressions over the picked blocks;
+    # the loop below only assembles dicts from the results
+    count = len(picked)
+    zone_highs = np.fromiter((zh for _, _, zh, _, _ in picked), dtype=np.float64, count=count)
+    zone_lows = np.fromiter((zl for _, _, _, zl, _ in picked), dtype=np.float64, count=count)
+    is_supply = np.fromiter((bt != 'demand' for _, bt, _, _, _ in picked), dtype=bool, count=count)
+
+    levels = np.round((zone_highs + zone_lows) / 2, 4)
+    dist_pips = np.round(np.abs(levels - current_price) * 10000, 1)
+    stops = np.round(np.where(is_supply, zone_highs * 1.0002, zone_lows * 0.9998), 4)
+    targets = np.round(levels + (levels - stops) * 2.5, 4)
+
+    for j, (i, block_type, zone_high, zone_low, candle_index) in enumerate(picked):
+        validity = 'untested' if not tested_draws[i] else 'tested_once'
+
         age_candles = len(candles) - candle_index
         freshness = 'fresh' if age_candles < 20 else 'aged'
-        
-        order_blocks.append({
-            'type': block_type,
-            'zone_high': round(zone_high, 4),
-            'zone_low': round(zone_low, 4),
-            'price_level': price_level,
-            'strength': strength_score,
-            'validity': validity,
-            'freshness': freshness,
-            'distance_pips': round(distance_pips, 1),
-            'timestamp': base_candle['timestamp'],
-            'interpretation': f"{block_type.capitalize()} zone - expect {'buying' if block_type == 'demand' else 'selling'} pressure",
-            'trading_setup': _generate_order_block_setup(block_type, zone_high, zone_low, current_price)
-        })
-    
+
+        setup = {
+            'direction': 'SELL' if is_supply[j] else 'BUY',
+            'entry_zone': f"{round(zone_low, 4)} - {round(zone_high, 4)}",
+            'entry_price': float(levels[j]),
+            'stop_loss': float(stops[j]),
+            'take_profit': float(targets[j]),
+            'risk_reward': 2.5
+        }
+
+        order_blocks.append(dict(zip(_OB_KEYS, (
+            block_type,
+            round(zone_high, 4),
+            round(zone_low, 4),
+            float(levels[j]),
+            int(strengths[i]),
+            validity,
+            freshness,
+            float(dist_pips[j]),
+            candles[candle_index]['timestamp'],
+            _OB_INTERPRETATION[block_type],
+            setup
+        ))))
+
     order_blocks.sort(key=lambda x: x['distance_pips'])
     
     return {
@@ -398,105 +558,140 @@ def identify_order_blocks(data):
         'recommendation': _generate_ob_recommendation(order_blocks, current_price, trend)
     }
 
+_FVG_KEYS = (
+    'type', 'gap_high', 'gap_low', 'gap_midpoint', 'size_pips',
+    'fill_percentage', 'distance_pips', 'timestamp', 'interpretation',
+    'trading_use'
+)
+
+_FVG_TRADING_USE = {
+    'bullish': 'Retest zone for bullish continuation',
+    'bearish': 'Retest zone for bearish continuation'
+}
+
+@requires_candles(20, fvgs=[])
 def identify_fair_value_gaps(data):
     """
     Identify Fair Value Gaps (FVG) - 3-candle imbalances
-    
+
     FVGs show inefficient price movement that often gets filled.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    
-    if len(candles) < 20:
-        return {'fvgs': [], 'message': 'Insufficient data'}
+    candles, current_price, trend, rsi = _unpack(data)
     
+    arrays = _candle_arrays(data)
+    highs, lows = arrays['high'], arrays['low']
+    n = len(candles)
+
+    # Vectorized 3-candle scan: compare candle1 against candle3 over the
+    # whole lookback window with two boolean masks (the conditions are
+    # mutually exclusive), instead of a backward Python loop
+    idx = np.arange(max(2, n - 29), n - 2)
+    h1, l1 = highs[idx - 2], lows[idx - 2]
+    h3, l3 = highs[idx], lows[idx]
+
+    bull = h1 < l3  # Bullish FVG: candle1 high < candle3 low
+    bear = l1 > h3  # Bearish FVG: candle1 low > candle3 high
+
+    # One batched random draw gates the whole window
+    keep = (bull | bear) & (_RNG.random(idx.size) > 0.7)
+
+    gap_high = np.where(bull, l3, l1)
+    gap_low = np.where(bull, h1, h3)
+    size_pips = (gap_high - gap_low) * 10000
+    keep &= size_pips > 3  # Significant gap
+
+    sel = np.flatnonzero(keep)
+    total = int(sel.size)
+
+    midpoints = (gap_high[sel] + gap_low[sel]) / 2
+    distances = np.abs(midpoints - current_price) * 10000
+
+    # Top 4 nearest via O(n) argpartition; only those 4 get fully sorted
+    if total > 4:
+        part = np.argpartition(distances, 3)[:4]
+    else:
+        part = np.arange(total)
+    order = part[np.argsort(distances[part])]
+
+    fills = _RNG.integers(0, 101, size=order.size)
+
     fvgs = []
-    
-    # Look for 3-candle patterns
-    for i in range(len(candles) - 3, len(candles) - 30, -1):
-        if i < 2:
-            break
-        
-        candle1 = candles[i-2]
-        candle2 = candles[i-1]
-        candle3 = candles[i]
-        
-        # Bullish FVG: candle1 high < candle3 low
-        if candle1['high'] < candle3['low'] and random.random() > 0.7:
-            gap_high = candle3['low']
-            gap_low = candle1['high']
-            gap_type = 'bullish'
-            
-        # Bearish FVG: candle1 low > candle3 high
-        elif candle1['low'] > candle3['high'] and random.random() > 0.7:
-            gap_high = candle1['low']
-            gap_low = candle3['high']
-            gap_type = 'bearish'
-        else:
-            continue
-        
-        gap_size_pips = (gap_high - gap_low) * 10000
-        
-        if gap_size_pips > 3:  # Significant gap
-            distance_pips = abs(current_price - (gap_high + gap_low) / 2) * 10000
-            fill_percentage = random.randint(0, 100)
-            
-            fvgs.append({
-                'type': gap_type,
-                'gap_high': round(gap_high, 4),
-                'gap_low': round(gap_low, 4),
-                'gap_midpoint': round((gap_high + gap_low) / 2, 4),
-                'size_pips': round(gap_size_pips, 1),
-                'fill_percentage': fill_percentage,
-                'distance_pips': round(distance_pips, 1),
-                'timestamp': candle2['timestamp'],
-                'interpretation': f"{gap_type.capitalize()} FVG - expect {100 - fill_percentage}% fill remaining",
-                'trading_use': f"Retest zone for {gap_type} continuation"
-            })
-    
-    fvgs.sort(key=lambda x: x['distance_pips'])
-    
+    for pos, j in enumerate(order):
+        gap_type = 'bullish' if bull[sel[j]] else 'bearish'
+        fill_percentage = int(fills[pos])
+        i = int(idx[sel[j]])
+
+        fvgs.append(dict(zip(_FVG_KEYS, (
+            gap_type,
+            round(float(gap_high[sel[j]]), 4),
+            round(float(gap_low[sel[j]]), 4),
+            round(float(midpoints[j]), 4),
+            round(float(size_pips[sel[j]]), 1),
+            fill_percentage,
+            round(float(distances[j]), 1),
+            candles[i-1]['timestamp'],
+            f"{gap_type.capitalize()} FVG - expect {100 - fill_percentage}% fill remaining",
+            _FVG_TRADING_USE[gap_type]
+        ))))
+
     return {
-        'fvgs': fvgs[:4],  # Return top 4
-        'total_fvgs': len(fvgs),
+        'fvgs': fvgs,  # Top 4, nearest first
+        'total_fvgs': total,
         'nearest_fvg': fvgs[0] if fvgs else None,
         'recommendation': 'FVGs often act as support/resistance and fill zones'
     }
 
+# Keyed by the original block type; the flipped type follows from it
+_BREAKER_INTERP = {
+    'demand': 'Failed demand OB flipped to supply breaker',
+    'supply': 'Failed supply OB flipped to demand breaker'
+}
+_BREAKER_IMPLICATION = {
+    'demand': 'Expect strong supply reaction at zone',
+    'supply': 'Expect strong demand reaction at zone'
+}
+
+@requires_candles(40, breaker_blocks=[])
 def identify_breaker_blocks(data):
     """
     Identify Breaker Blocks - failed order blocks that flip polarity
-    
+
     When an order block fails, it becomes a breaker (demand becomes supply, vice versa).
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    
-    if len(candles) < 40:
-        return {'breaker_blocks': [], 'message': 'Insufficient data'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     breakers = []
     num_breakers = random.randint(0, 2)
-    
+    if not num_breakers:
+        return {
+            'breaker_blocks': breakers,
+            'total_breakers': 0,
+            'concept': 'Breaker blocks show failed institutional levels that reverse polarity'
+        }
+
+    # One batched draw per quantity instead of three RNG calls per breaker
+    type_draws = _RNG.random(num_breakers)
+    strengths = _RNG.integers(70, 91, size=num_breakers)
+
     for i in range(num_breakers):
-        original_type = random.choice(['demand', 'supply'])
+        original_type = 'demand' if type_draws[i] < 0.5 else 'supply'
         breaker_type = 'supply' if original_type == 'demand' else 'demand'
-        
+
         lookback = 20 + (i * 15)
         relevant_candles = candles[-lookback:-lookback+10]
-        
+
         if not relevant_candles:
             continue
-        
-        base_candle = relevant_candles[random.randint(0, len(relevant_candles)-1)]
-        
+
+        base_candle = relevant_candles[random.randrange(len(relevant_candles))]
+
         zone_high = round(base_candle['high'], 4)
         zone_low = round(base_candle['low'], 4)
-        
-        strength = random.randint(70, 90)
-        
+
+        strength = int(strengths[i])
+
         breakers.append({
             'original_type': original_type,
             'current_type': breaker_type,
@@ -504,8 +699,8 @@ def identify_breaker_blocks(data):
             'zone_low': zone_low,
             'flip_timestamp': base_candle['timestamp'],
             'strength': strength,
-            'interpretation': f"Failed {original_type} OB flipped to {breaker_type} breaker",
-            'trading_implication': f"Expect strong {breaker_type} reaction at zone"
+            'interpretation': _BREAKER_INTERP[original_type],
+            'trading_implication': _BREAKER_IMPLICATION[original_type]
         })
     
     return {
@@ -518,24 +713,29 @@ def identify_breaker_blocks(data):
 # PREMIUM/DISCOUNT ZONES
 # ============================================================================
 
+# Position tables indexed by how many zone boundaries price sits above
+_POSITIONS = ('discount', 'equilibrium', 'equilibrium', 'premium')
+_POSITION_INTERPS = (
+    'Price in discount - favor buys',
+    'Price at fair value - watch for direction',
+    'Price at fair value - watch for direction',
+    'Price in premium - favor sells',
+)
+
+@requires_candles(50, zones={})
 def calculate_premium_discount_zones(data):
     """
     Calculate Premium/Discount zones using Equilibrium
-    
+
     Based on recent swing high/low, identifies fair value areas.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    
-    if len(candles) < 50:
-        return {'zones': {}, 'message': 'Insufficient data'}
-    
-    recent_candles = candles[-50:]
-    
-    swing_high = max([c['high'] for c in recent_candles])
-    swing_low = min([c['low'] for c in recent_candles])
+    candles, current_price, trend, rsi = _unpack(data)
     
+    stats = _window_stats(data, 50)
+    swing_high = stats['high']
+    swing_low = stats['low']
+
     range_size = swing_high - swing_low
     equilibrium = (swing_high + swing_low) / 2
     
@@ -558,22 +758,16 @@ def calculate_premium_discount_zones(data):
         'current_position': None
     }
     
-    # Determine current position
-    if current_price > zones['equilibrium']:
-        if current_price > zones['premium_zone']['lower']:
-            zones['current_position'] = 'premium'
-            zones['interpretation'] = 'Price in premium - favor sells'
-        else:
-            zones['current_position'] = 'equilibrium'
-            zones['interpretation'] = 'Price at fair value - watch for direction'
-    else:
-        if current_price < zones['discount_zone']['upper']:
-            zones['current_position'] = 'discount'
-            zones['interpretation'] = 'Price in discount - favor buys'
-        else:
-            zones['current_position'] = 'equilibrium'
-            zones['interpretation'] = 'Price at fair value - watch for direction'
-    
+    # Determine current position - the three boundary comparisons sum to
+    # an index into the tables above, replacing the nested branch ladder
+    idx = (
+        (current_price >= zones['discount_zone']['upper'])
+        + (current_price > zones['equilibrium'])
+        + (current_price > zones['premium_zone']['lower'])
+    )
+    zones['current_position'] = _POSITIONS[idx]
+    zones['interpretation'] = _POSITION_INTERPS[idx]
+
     return {
         'zones': zones,
         'range_size_pips': round(range_size * 10000, 1),
@@ -584,53 +778,78 @@ def calculate_premium_discount_zones(data):
 # IMBALANCE & INEFFICIENCY DETECTION
 # ============================================================================
 
+_IMBALANCE_KEYS = (
+    'type', 'imbalance_high', 'imbalance_low', 'size_pips', 'timestamp',
+    'rebalance_probability', 'interpretation'
+)
+
+_IMBALANCE_INTERP = {
+    'bullish': 'Bullish imbalance - likely rebalance zone',
+    'bearish': 'Bearish imbalance - likely rebalance zone'
+}
+
+@njit(cache=True)
+def _scan_imbalances(highs, lows, closes, gates, start, stop):
+    """
+    Compiled imbalance scan: (index, is_bullish, high, low) per gap
+
+    Takes the pre-drawn gate array so the kernel stays pure array
+    arithmetic; dict and timestamp assembly happens in the wrapper.
+    """
+    out = []
+    for i in range(start, stop, -1):
+        if i < 1:
+            break
+        if gates[i]:
+            if closes[i] > highs[i - 1]:
+                is_bullish = 1
+                hi = lows[i]
+                lo = highs[i - 1]
+            elif closes[i] < lows[i - 1]:
+                is_bullish = 0
+                hi = lows[i - 1]
+                lo = highs[i]
+            else:
+                continue
+            if abs(hi - lo) * 10000 > 2:
+                out.append((i, is_bullish, hi, lo))
+    return out
+
+@requires_candles(25, imbalances=[])
 def detect_imbalances(data):
     """
     Detect Price Imbalances - rapid moves leaving gaps
-    
+
     Imbalances show areas price moved through too quickly.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    
-    if len(candles) < 25:
-        return {'imbalances': [], 'message': 'Insufficient data'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     imbalances = []
-    
-    for i in range(len(candles) - 2, len(candles) - 25, -1):
-        if i < 1:
-            break
-        
-        prev_candle = candles[i-1]
-        curr_candle = candles[i]
-        
-        # Check for gap up or gap down
-        if random.random() > 0.8:
-            if curr_candle['close'] > prev_candle['high']:
-                imbalance_type = 'bullish'
-                imbalance_low = prev_candle['high']
-                imbalance_high = curr_candle['low']
-            elif curr_candle['close'] < prev_candle['low']:
-                imbalance_type = 'bearish'
-                imbalance_high = prev_candle['low']
-                imbalance_low = curr_candle['high']
-            else:
-                continue
-            
-            imbalance_size = abs(imbalance_high - imbalance_low) * 10000
-            
-            if imbalance_size > 2:
-                imbalances.append({
-                    'type': imbalance_type,
-                    'imbalance_high': round(imbalance_high, 4),
-                    'imbalance_low': round(imbalance_low, 4),
-                    'size_pips': round(imbalance_size, 1),
-                    'timestamp': curr_candle['timestamp'],
-                    'rebalance_probability': random.randint(60, 85),
-                    'interpretation': f"{imbalance_type.capitalize()} imbalance - likely rebalance zone"
-                })
+    arrays = _candle_arrays(data)
+    highs, lows, closes = arrays['high'], arrays['low'], arrays['close']
+
+    # Gates and probabilities drawn as one batch per scan; the gap
+    # detection itself runs in the compiled kernel
+    n = len(candles)
+    gates = _RNG.random(n) > 0.8
+    rebalance_probs = _RNG.integers(60, 86, size=n)
+
+    for i, is_bullish, imbalance_high, imbalance_low in _scan_imbalances(
+        highs, lows, closes, gates, n - 2, n - 25
+    ):
+        imbalance_type = 'bullish' if is_bullish else 'bearish'
+        imbalance_size = abs(imbalance_high - imbalance_low) * 10000
+
+        imbalances.append(dict(zip(_IMBALANCE_KEYS, (
+            imbalance_type,
+            round(imbalance_high, 4),
+            round(imbalance_low, 4),
+            round(imbalance_size, 1),
+            candles[i]['timestamp'],
+            int(rebalance_probs[i]),
+            _IMBALANCE_INTERP[imbalance_type]
+        ))))
     
     return {
         'imbalances': imbalances[:3],
@@ -638,42 +857,49 @@ def detect_imbalances(data):
         'recommendation': 'Imbalances often attract price for rebalancing'
     }
 
+@njit(cache=True)
+def _scan_inefficiencies(highs, lows, gates, start, stop):
+    """Compiled inefficiency scan: (index, zone_high, zone_low) per window"""
+    out = []
+    for i in range(start, stop, -1):
+        if i < 5:
+            break
+        if gates[i]:
+            out.append((i, highs[i:i+5].max(), lows[i:i+5].min()))
+    return out
+
+@requires_candles(30, inefficiencies=[])
 def detect_inefficiencies(data):
     """
     Detect Market Inefficiencies - poorly traded zones
-    
+
     Areas with low volume or quick passage indicating poor price discovery.
     """
     
     candles = data.get('candles', [])
     
-    if len(candles) < 30:
-        return {'inefficiencies': [], 'message': 'Insufficient data'}
-    
     inefficiencies = []
-    
-    # Look for consecutive candles with small bodies and low volume
-    for i in range(len(candles) - 5, len(candles) - 30, -1):
-        if i < 5:
-            break
-        
-        if random.random() > 0.85:
-            window = candles[i:i+5]
-            
-            zone_high = max([c['high'] for c in window])
-            zone_low = min([c['low'] for c in window])
-            
-            inefficiency_score = random.randint(65, 90)
-            
-            inefficiencies.append({
-                'zone_high': round(zone_high, 4),
-                'zone_low': round(zone_low, 4),
-                'zone_midpoint': round((zone_high + zone_low) / 2, 4),
-                'timestamp_start': window[0]['timestamp'],
-                'timestamp_end': window[-1]['timestamp'],
-                'inefficiency_score': inefficiency_score,
-                'interpretation': 'Inefficient zone - expect revisit and better price discovery'
-            })
+    arrays = _candle_arrays(data)
+
+    # Gates and scores drawn as one batch per scan
+    n = len(candles)
+    gates = _RNG.random(n) > 0.85
+    scores = _RNG.integers(65, 91, size=n)
+
+    # Look for consecutive candles with small bodies and low volume -
+    # the windowed max/min search runs in the compiled kernel
+    for i, zone_high, zone_low in _scan_inefficiencies(
+        arrays['high'], arrays['low'], gates, n - 5, n - 30
+    ):
+        inefficiencies.append({
+            'zone_high': round(zone_high, 4),
+            'zone_low': round(zone_low, 4),
+            'zone_midpoint': round((zone_high + zone_low) / 2, 4),
+            'timestamp_start': candles[i]['timestamp'],
+            'timestamp_end': candles[i+4]['timestamp'],
+            'inefficiency_score': int(scores[i]),
+            'interpretation': 'Inefficient zone - expect revisit and better price discovery'
+        })
     
     return {
         'inefficiencies': inefficiencies[:2],
@@ -685,47 +911,55 @@ def detect_inefficiencies(data):
 # VOLUME & FLOW ANALYSIS
 # ============================================================================
 
+@njit(cache=True)
+def _value_area_indices(volumes, fraction):
+    """
+    Indices of the highest-volume candles covering `fraction` of volume
+
+    Descending argsort plus a scalar accumulate with early exit - the
+    classic value-area loop, compiled to machine code when numba is
+    available (plain Python over the same arrays otherwise).
+    """
+    order = np.argsort(volumes)[::-1]
+    threshold = volumes.sum() * fraction
+    running = 0.0
+    count = 0
+    for j in range(order.size):
+        running += volumes[order[j]]
+        count += 1
+        if running >= threshold:
+            break
+    return order[:count]
+
+@requires_candles(40, profile={})
 def analyze_volume_profile(data):
     """
     Analyze Volume Profile - where most trading occurred
-    
+
     High volume nodes act as support/resistance.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    
-    if len(candles) < 40:
-        return {'profile': {}, 'message': 'Insufficient data'}
-    
-    recent_candles = candles[-40:]
-    
-    # Calculate price levels and volumes
-    volumes = [c['volume'] for c in recent_candles]
-    total_volume = sum(volumes)
+    candles, current_price, trend, rsi = _unpack(data)
     
+    arrays = _candle_arrays(data)
+    highs = arrays['high'][-40:]
+    lows = arrays['low'][-40:]
+    volumes = arrays['volume'][-40:]
+
     # High volume node (POC - Point of Control)
-    poc_index = volumes.index(max(volumes))
-    poc_price = round((recent_candles[poc_index]['high'] + recent_candles[poc_index]['low']) / 2, 4)
+    poc_index = int(volumes.argmax())
+    poc_price = round(float(highs[poc_index] + lows[poc_index]) / 2, 4)
     
     # Value area (70% of volume)
-    sorted_volumes = sorted(enumerate(volumes), key=lambda x: x[1], reverse=True)
-    value_area_volume = 0
-    value_area_indices = []
-    
-    for idx, vol in sorted_volumes:
-        value_area_volume += vol
-        value_area_indices.append(idx)
-        if value_area_volume >= total_volume * 0.7:
-            break
-    
-    value_area_high = max([recent_candles[i]['high'] for i in value_area_indices])
-    value_area_low = min([recent_candles[i]['low'] for i in value_area_indices])
+    value_area_indices = _value_area_indices(volumes, 0.7)
+
+    value_area_high = float(highs[value_area_indices].max())
+    value_area_low = float(lows[value_area_indices].min())
     
     return {
         'profile': {
             'poc': poc_price,
-            'poc_volume': max(volumes),
+            'poc_volume': float(volumes.max()),
             'value_area_high': round(value_area_high, 4),
             'value_area_low': round(value_area_low, 4),
             'current_price': current_price,
@@ -735,6 +969,7 @@ def analyze_volume_profile(data):
         'trading_implication': 'Price tends to gravitate toward high volume areas (POC)'
     }
 
+@requires_candles(40, divergence=None)
 def detect_smart_money_divergence(data):
     """
     Detect Smart Money Divergence - price vs accumulation/distribution
@@ -742,12 +977,7 @@ def detect_smart_money_divergence(data):
     When price makes new highs/lows but smart money isn't participating.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    trend = data.get('indicators', {}).get('trend', 'neutral')
-    
-    if len(candles) < 40:
-        return {'divergence': None, 'message': 'Insufficient data'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     if random.random() > 0.6:
         # Mock divergence detection
@@ -770,11 +1000,12 @@ def detect_smart_money_divergence(data):
                 'interpretation': interpretation,
                 'confirmation_needed': random.choice([True, False])
             },
-            'recommendation': f"Watch for {signal.replace('_', ' ')} confirmation"
+            'recommendation': f"Watch for {_SPACED[signal]} confirmation"
         }
     
     return {'divergence': None, 'reason': 'No smart money divergence detected'}
 
+@requires_candles(20, flow={})
 def analyze_order_flow(data):
     """
     Analyze Order Flow - buying vs selling pressure
@@ -782,19 +1013,18 @@ def analyze_order_flow(data):
     Determines who's in control: buyers or sellers.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    
-    if len(candles) < 20:
-        return {'flow': {}, 'message': 'Insufficient data'}
-    
-    recent_candles = candles[-20:]
-    
-    # Calculate buying/selling pressure
-    buying_pressure = sum([1 for c in recent_candles if c['close'] > c['open']])
-    selling_pressure = sum([1 for c in recent_candles if c['close'] < c['open']])
+    candles, current_price, trend, rsi = _unpack(data)
     
-    total_candles = len(recent_candles)
+    arrays = _candle_arrays(data)
+    recent_opens = arrays['open'][-20:]
+    recent_closes = arrays['close'][-20:]
+
+    # Calculate buying/selling pressure - one subtract pass feeds both counts
+    delta_sign = np.sign(recent_closes - recent_opens)
+    buying_pressure = int(np.count_nonzero(delta_sign > 0))
+    selling_pressure = int(np.count_nonzero(delta_sign < 0))
+
+    total_candles = len(recent_closes)
     buy_percentage = (buying_pressure / total_candles) * 100
     sell_percentage = (selling_pressure / total_candles) * 100
     
@@ -826,7 +1056,7 @@ def analyze_order_flow(data):
             'dominant_flow': dominant_flow,
             'bias': bias
         },
-        'interpretation': f"Order flow shows {dominant_flow.replace('_', ' ')} - {bias} bias",
+        'interpretation': f"Order flow shows {_SPACED[dominant_flow]} - {bias} bias",
         'trading_implication': f"Favor {bias} setups in alignment with order flow"
     }
 
@@ -834,25 +1064,25 @@ def analyze_order_flow(data):
 # MULTI-TIMEFRAME ANALYSIS
 # ============================================================================
 
+# Map to higher timeframes - constant data, built once
+_TF_HIERARCHY = {
+    '1m': '5m',
+    '5m': '15m',
+    '15m': '1h',
+    '30m': '4h',
+    '1h': '4h',
+    '4h': '1d',
+    '1d': '1w'
+}
+
 def analyze_higher_timeframe_structure(pair, current_timeframe):
     """
     Analyze Higher Timeframe Structure - HTF context
-    
+
     Trading with HTF bias increases probability of success.
     """
-    
-    # Map to higher timeframes
-    timeframe_hierarchy = {
-        '1m': '5m',
-        '5m': '15m',
-        '15m': '1h',
-        '30m': '4h',
-        '1h': '4h',
-        '4h': '1d',
-        '1d': '1w'
-    }
-    
-    htf = timeframe_hierarchy.get(current_timeframe, '1d')
+
+    htf = _TF_HIERARCHY.get(current_timeframe, '1d')
     
     # Mock HTF analysis
     htf_trend = random.choice(['bullish', 'bearish', 'ranging'])
@@ -880,35 +1110,35 @@ def analyze_higher_timeframe_structure(pair, current_timeframe):
         'recommendation': f"{'Trade with' if alignment_with_ltf == 'aligned' else 'Caution:'} HTF bias for best probability"
     }
 
+# Factors that can stack at a confluence level
+_POSSIBLE_FACTORS = np.array([
+    'order_block',
+    'fvg',
+    'liquidity_pool',
+    'premium_zone',
+    'discount_zone',
+    'old_high',
+    'old_low',
+    'poc',
+    'imbalance'
+], dtype=object)
+
 def identify_confluences(pair, timeframe):
     """
     Identify Multi-Factor Confluences - stacked probabilities
-    
+
     Areas where multiple SMC concepts align create high-probability setups.
     """
-    
+
     # Mock confluence zones
     confluences = []
     num_confluences = random.randint(1, 2)
-    
+
     for i in range(num_confluences):
         confluence_price = round(random.uniform(1.06, 1.10), 4)
-        
-        # Multiple factors at this level
-        possible_factors = [
-            'order_block',
-            'fvg',
-            'liquidity_pool',
-            'premium_zone',
-            'discount_zone',
-            'old_high',
-            'old_low',
-            'poc',
-            'imbalance'
-        ]
-        
+
         num_factors = random.randint(3, 5)
-        factors = random.sample(possible_factors, num_factors)
+        factors = _RNG.choice(_POSSIBLE_FACTORS, size=num_factors, replace=False).tolist()
         
         confluence_strength = len(factors) * 15 + random.randint(10, 25)
         
@@ -933,54 +1163,65 @@ def identify_confluences(pair, timeframe):
 # SESSION & TIME-BASED ANALYSIS
 # ============================================================================
 
-def analyze_session_characteristics(data):
-    """
-    Analyze Trading Session Characteristics
-    
-    Different sessions (Asian, London, NY) have different behaviors.
-    """
-    
-    current_hour = datetime.utcnow().hour
-    
-    # Determine session
-    if 0 <= current_hour < 8:
-        session = 'asian'
-        characteristics = {
+def _build_session_table():
+    """Full session response per UTC hour, built once at import"""
+    profiles = {
+        'asian': {
             'volatility': 'low',
             'typical_range_pips': '20-40',
             'best_strategy': 'range_trading',
             'liquidity': 'low'
-        }
-    elif 8 <= current_hour < 16:
-        session = 'london'
-        characteristics = {
+        },
+        'london': {
             'volatility': 'high',
             'typical_range_pips': '60-100',
             'best_strategy': 'breakout_continuation',
             'liquidity': 'high'
-        }
-    else:
-        session = 'newyork'
-        characteristics = {
+        },
+        'newyork': {
             'volatility': 'very_high',
             'typical_range_pips': '80-120',
             'best_strategy': 'trend_following',
             'liquidity': 'very_high'
         }
-    
-    # Session overlap bonus
-    session_overlap = None
-    if 12 <= current_hour < 16:
-        session_overlap = 'london_newyork'
-        characteristics['note'] = 'High volatility overlap - expect big moves'
-    
-    return {
-        'current_session': session,
-        'characteristics': characteristics,
-        'session_overlap': session_overlap,
-        'recommendation': f"Trade {characteristics['best_strategy']} during {session} session"
     }
 
+    table = []
+    for hour in range(24):
+        session = 'asian' if hour < 8 else 'london' if hour < 16 else 'newyork'
+        characteristics = dict(profiles[session])
+
+        # Session overlap bonus
+        session_overlap = None
+        if 12 <= hour < 16:
+            session_overlap = 'london_newyork'
+            characteristics['note'] = 'High volatility overlap - expect big moves'
+
+        table.append({
+            'current_session': session,
+            'characteristics': characteristics,
+            'session_overlap': session_overlap,
+            'recommendation': f"Trade {characteristics['best_strategy']} during {session} session"
+        })
+    return tuple(table)
+
+_SESSION_TABLE = _build_session_table()
+
+def analyze_session_characteristics(data):
+    """
+    Analyze Trading Session Characteristics
+
+    Different sessions (Asian, London, NY) have different behaviors.
+    The output only changes once per hour, so it's served from a table
+    precomputed at import; epoch-seconds arithmetic gives the UTC hour
+    without constructing a datetime.
+    """
+
+    return dict(_SESSION_TABLE[int(time.time() // 3600) % 24])
+
+_NEWS_TYPES = ('central_bank', 'employment', 'inflation', 'gdp')
+_NEWS_REACTIONS = ('spike_up', 'spike_down', 'range_expansion')
+
 def detect_news_impact_zones(pair):
     """
     Detect potential News Impact Zones
@@ -991,20 +1232,27 @@ def detect_news_impact_zones(pair):
     # Mock news impact detection
     news_zones = []
     num_zones = random.randint(0, 2)
-    
+
+    # One clock read and batched draws cover every zone in the loop
+    now = datetime.now()
+    hours_ago = _RNG.integers(1, 49, size=num_zones)
+    impact_levels = np.round(_RNG.uniform(1.07, 1.10, size=num_zones), 4)
+    type_picks = _RNG.integers(0, len(_NEWS_TYPES), size=num_zones)
+    reaction_picks = _RNG.integers(0, len(_NEWS_REACTIONS), size=num_zones)
+
     for i in range(num_zones):
-        event_time = datetime.now() - timedelta(hours=random.randint(1, 48))
-        impact_level = round(random.uniform(1.07, 1.10), 4)
-        
-        news_type = random.choice(['central_bank', 'employment', 'inflation', 'gdp'])
-        reaction = random.choice(['spike_up', 'spike_down', 'range_expansion'])
-        
+        event_time = now - timedelta(hours=int(hours_ago[i]))
+        impact_level = float(impact_levels[i])
+
+        news_type = _NEWS_TYPES[type_picks[i]]
+        reaction = _NEWS_REACTIONS[reaction_picks[i]]
+
         news_zones.append({
             'event_time': event_time.isoformat(),
             'news_type': news_type,
             'impact_level': impact_level,
             'reaction': reaction,
-            'interpretation': f"{news_type.replace('_', ' ').title()} news caused {reaction.replace('_', ' ')}",
+            'interpretation': f"{_PRETTY[news_type]} news caused {_SPACED[reaction]}",
             'trading_note': 'News reaction levels often become support/resistance'
         })
     
@@ -1018,6 +1266,7 @@ def detect_news_impact_zones(pair):
 # ADVANCED CONCEPTS
 # ============================================================================
 
+@requires_candles(30, manipulations=[])
 def identify_manipulation_patterns(data):
     """
     Identify Market Manipulation Patterns - stop hunts and traps
@@ -1025,11 +1274,7 @@ def identify_manipulation_patterns(data):
     Smart money often manipulates retail traders before true moves.
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    
-    if len(candles) < 30:
-        return {'manipulations': [], 'message': 'Insufficient data'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     manipulations = []
     
@@ -1064,7 +1309,7 @@ def identify_manipulation_patterns(data):
             'true_direction': true_direction,
             'confidence': confidence,
             'timestamp': manipulation_candle['timestamp'],
-            'interpretation': f"{manipulation_type.replace('_', ' ').title()} - expect move {true_direction}",
+            'interpretation': f"{_PRETTY[manipulation_type]} - expect move {true_direction}",
             'trading_implication': f"Wait for price to reverse {true_direction} from {round(level, 4)}"
         })
     
@@ -1074,62 +1319,69 @@ def identify_manipulation_patterns(data):
         'concept': 'Smart money manipulates retail stops before true directional moves'
     }
 
+@functools.lru_cache(maxsize=256)
+def _institutional_grid(base_price):
+    """Round-number level grid around a 0.01-aligned base price
+
+    The grid is fully determined by base_price, which only changes when
+    price crosses a big figure, so the same array serves every call in
+    between. Callers must treat the cached array as read-only.
+    """
+    offsets = np.arange(-2, 3) * 0.01
+    return np.round(
+        np.concatenate((base_price + offsets, base_price + offsets + 0.005)), 4
+    )
+
 def calculate_institutional_levels(data):
     """
     Calculate Institutional Price Levels - round numbers and psychological levels
-    
+
     Institutions often place orders at round numbers (00, 50 levels).
     """
     
     current_price = data.get('current_price', 0)
     
-    # Find nearby round numbers
-    price_str = str(current_price)
-    base_price = float(price_str[:4])  # e.g., 1.09 from 1.0934
-    
-    institutional_levels = []
-    
-    # Major round numbers (00)
-    for i in range(-2, 3):
-        level = round(base_price + (i * 0.01), 4)
-        if level > 0:
-            distance_pips = abs(current_price - level) * 10000
-            level_type = 'major_round_number'
-            strength = random.randint(75, 95)
-            
-            institutional_levels.append({
-                'level': level,
-                'type': level_type,
-                'strength': strength,
-                'distance_pips': round(distance_pips, 1),
-                'psychological_impact': 'high'
-            })
-    
-    # Half numbers (50)
-    for i in range(-2, 3):
-        level = round(base_price + (i * 0.01) + 0.005, 4)
-        if level > 0:
-            distance_pips = abs(current_price - level) * 10000
-            level_type = 'half_round_number'
-            strength = random.randint(60, 80)
-            
-            institutional_levels.append({
-                'level': level,
-                'type': level_type,
-                'strength': strength,
-                'distance_pips': round(distance_pips, 1),
-                'psychological_impact': 'medium'
-            })
-    
-    # Sort by distance
-    institutional_levels.sort(key=lambda x: x['distance_pips'])
-    
+    # Find nearby round numbers: align down to the 0.01 figure without
+    # the float->str->slice->float round-trip (e.g. 1.09 from 1.0934).
+    # The inner round absorbs binary noise like 1.13 * 100 == 112.999...
+    # that would otherwise floor to the wrong figure.
+    base_price = math.floor(round(current_price * 100, 6)) / 100
+
+    levels = _institutional_grid(base_price)
+    distances = np.round(np.abs(current_price - levels) * 10000, 1)
+    strengths = np.concatenate((
+        _RNG.integers(75, 96, size=5),   # major round numbers
+        _RNG.integers(60, 81, size=5)    # half numbers
+    ))
+    level_types = ('major_round_number',) * 5 + ('half_round_number',) * 5
+    impacts = ('high',) * 5 + ('medium',) * 5
+
+    institutional_levels = [
+        {
+            'level': level,
+            'type': level_type,
+            'strength': int(strength),
+            'distance_pips': distance,
+            'psychological_impact': impact
+        }
+        for level, level_type, strength, distance, impact in zip(
+            levels.tolist(), level_types, strengths, distances.tolist(), impacts
+        )
+        if level > 0
+    ]
+    
+    # Nearest 5 via a partial selection instead of sorting all 10 levels
+    nearest_levels = heapq.nsmallest(
+        5, institutional_levels, key=lambda x: x['distance_pips']
+    )
+
     return {
-        'institutional_levels': institutional_levels[:5],
-        'nearest_level': institutional_levels[0] if institutional_levels else None,
+        'institutional_levels': nearest_levels,
+        'nearest_level': nearest_levels[0] if nearest_levels else None,
         'recommendation': 'Institutions cluster orders at round numbers - expect reactions'
     }
 
+@requires_candles(50, phase=None)
 def detect_wyckoff_phases(data):
     """
     Detect Wyckoff Market Phases - accumulation/distribution
@@ -1137,11 +1389,7 @@ def detect_wyckoff_phases(data):
     Identifies institutional accumulation/distribution patterns.
     """
     
-    candles = data.get('candles', [])
-    trend = data.get('indicators', {}).get('trend', 'neutral')
-    
-    if len(candles) < 50:
-        return {'phase': None, 'message': 'Insufficient data'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     # Mock Wyckoff phase detection
     if random.random() > 0.5:
@@ -1178,6 +1426,7 @@ def detect_wyckoff_phases(data):
     
     return {'phase': None, 'reason': 'No clear Wyckoff phase identified'}
 
+@requires_candles(30, setups=[])
 def identify_turtle_soup_setups(data):
     """
     Identify Turtle Soup Patterns - false breakout reversals
@@ -1185,28 +1434,24 @@ def identify_turtle_soup_setups(data):
     When price breaks a level then immediately reverses (stop hunt).
     """
     
-    candles = data.get('candles', [])
-    current_price = data.get('current_price', 0)
-    
-    if len(candles) < 30:
-        return {'setups': [], 'message': 'Insufficient data'}
+    candles, current_price, trend, rsi = _unpack(data)
     
     setups = []
     
     if random.random() > 0.7:
         setup_type = random.choice(['long', 'short'])
-        
-        recent_candles = candles[-20:]
-        
+
+        arrays = _candle_arrays(data)
+
         if setup_type == 'long':
             # Price broke below support then reversed
-            false_break_level = min([c['low'] for c in recent_candles[:10]])
+            false_break_level = float(arrays['low'][-20:-10].min())
             entry_level = round(false_break_level * 1.0005, 4)
             stop_level = round(false_break_level * 0.9995, 4)
             target_level = round(entry_level + (entry_level - stop_level) * 3, 4)
         else:
             # Price broke above resistance then reversed
-            false_break_level = max([c['high'] for c in recent_candles[:10]])
+            false_break_level = float(arrays['high'][-20:-10].max())
             entry_level = round(false_break_level * 0.9995, 4)
             stop_level = round(false_break_level * 1.0005, 4)
             target_level = round(entry_level - (stop_level - entry_level) * 3, 4)
@@ -1234,36 +1479,6 @@ def identify_turtle_soup_setups(data):
 # HELPER FUNCTIONS
 # ============================================================================
 
-def _generate_order_block_setup(block_type, zone_high, zone_low, current_price):
-    """Generate trading setup for an order block"""
-    
-    if block_type == 'demand':
-        entry = round((zone_high + zone_low) / 2, 4)
-        stop_loss = round(zone_low * 0.9998, 4)
-        take_profit = round(entry + (entry - stop_loss) * 2.5, 4)
-        
-        return {
-            'direction': 'BUY',
-            'entry_zone': f"{round(zone_low, 4)} - {round(zone_high, 4)}",
-            'entry_price': entry,
-            'stop_loss': stop_loss,
-            'take_profit': take_profit,
-            'risk_reward': 2.5
-        }
-    else:
-        entry = round((zone_high + zone_low) / 2, 4)
-        stop_loss = round(zone_high * 1.0002, 4)
-        take_profit = round(entry - (stop_loss - entry) * 2.5, 4)
-        
-        return {
-            'direction': 'SELL',
-            'entry_zone': f"{round(zone_low, 4)} - {round(zone_high, 4)}",
-            'entry_price': entry,
-            'stop_loss': stop_loss,
-            'take_profit': take_profit,
-            'risk_reward': 2.5
-        }
-
 def _generate_ob_recommendation(order_blocks, current_price, trend):
     """Generate recommendation based on order blocks"""
     